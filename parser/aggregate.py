@@ -0,0 +1,147 @@
+"""Python file used to total the seats of courses and departments. Created by Aykan Fonseca."""
+
+# Pip install packages. NumPy is optional: without it departments are totaled in a loop.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Local modules.
+from seats import encode_seats, UNLIMITED
+
+
+def aggregate_seats(seats):
+    """Totals one list of (seats taken, seats available) per course group. Returns (totals, waitlisted) lists.
+
+    A group with an unlimited course is unlimited. "-" seats count for nothing. A group is waitlisted when it is
+    unlimited or at least as many seats are taken as are available.
+    """
+
+    totals, waitlisted = [], []
+
+    for group_seats in seats:
+        seats_taken, seats_available = 0, 0
+
+        for (taken, available) in group_seats:
+            if taken == "Unlimited" or available == "Unlimited":
+                seats_taken, seats_available = "Unlimited", "Unlimited"
+                break
+            elif taken != "-" or available != "-":
+                seats_taken += taken
+                seats_available += available
+
+        totals.append((seats_taken, seats_available))
+        waitlisted.append(seats_taken == "Unlimited" or seats_taken >= seats_available)
+
+    return totals, waitlisted
+
+
+def aggregate_arrays(group_index, seats_taken, seats_available, num_groups):
+    """Totals seats encoded as integer arrays (see seats.encode_seats), one entry per course, into num_groups groups.
+
+    Returns arrays with one entry per group: (seats taken, seats available, unlimited courses, waitlisted, fill ratio).
+    Totals and fill ratios leave out unlimited and "-" seats, and fill ratios are NaN without any seats left.
+    Waitlisted is decided like aggregate_seats.
+    """
+
+    is_unlimited = (seats_taken == UNLIMITED) | (seats_available == UNLIMITED)
+    has_seats = (seats_taken >= 0) & (seats_available >= 0)
+
+    # Sums of whole numbers far below 2 ** 53, so the float totals of bincount are exact.
+    total_taken = numpy.bincount(group_index, weights=numpy.where(has_seats, seats_taken, 0), minlength=num_groups).astype("int64")
+    total_available = numpy.bincount(group_index, weights=numpy.where(has_seats, seats_available, 0), minlength=num_groups).astype("int64")
+    unlimited = numpy.bincount(group_index, weights=is_unlimited, minlength=num_groups).astype("int64")
+
+    waitlisted = (unlimited > 0) | (total_taken >= total_available)
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        fill_ratio = numpy.where(total_available > 0, total_taken / total_available.astype("float64"), numpy.nan)
+
+    return total_taken, total_available, unlimited, waitlisted, fill_ratio
+
+
+def fill_ratio(seats_taken, seats_available):
+    """Seats taken per seat available. None without any seats available."""
+
+    if not seats_available:
+        return None
+
+    return float(seats_taken) / seats_available
+
+
+def course_fill_ratios(grouped_data):
+    """Returns {code: fill ratio} of every course group. None for unlimited, "-", or no seats available."""
+
+    codes = sorted(grouped_data)
+    seats_taken = [encode_seats(grouped_data[code].seats[0]) for code in codes]
+    seats_available = [encode_seats(grouped_data[code].seats[1]) for code in codes]
+
+    if numpy is None:
+        return dict(
+            (code, fill_ratio(taken, available) if taken >= 0 and available >= 0 else None)
+            for code, taken, available in zip(codes, seats_taken, seats_available)
+        )
+
+    # Every course is a group of its own, so the ratios come out of one batch.
+    ratios = aggregate_arrays(numpy.arange(len(codes)), numpy.array(seats_taken, dtype="int64"),
+        numpy.array(seats_available, dtype="int64"), len(codes))[4]
+
+    return dict((code, None if numpy.isnan(ratio) else ratio.item()) for code, ratio in zip(codes, ratios))
+
+
+def department_rollups(grouped_data):
+    """Returns {department: {"courses", "waitlisted", "unlimited", "seats taken", "seats available", "fill ratio",
+    "course fill ratios"}}, where "course fill ratios" is course_fill_ratios of the department's courses.
+
+    Unlimited courses are counted, but their seats are not added to the department's.
+    """
+
+    codes = sorted(grouped_data)
+    departments = [code.partition(" ")[0] for code in codes]
+    seats_taken = [encode_seats(grouped_data[code].seats[0]) for code in codes]
+    seats_available = [encode_seats(grouped_data[code].seats[1]) for code in codes]
+    waitlisted = [grouped_data[code].waitlisted for code in codes]
+
+    names = sorted(set(departments))
+
+    if numpy is None:
+        rollups = dict((name, {"courses": 0, "waitlisted": 0, "unlimited": 0, "seats taken": 0, "seats available": 0}) for name in names)
+
+        for department, taken, available, is_waitlisted in zip(departments, seats_taken, seats_available, waitlisted):
+            rollup = rollups[department]
+            rollup["courses"] += 1
+            rollup["waitlisted"] += int(is_waitlisted)
+
+            if taken == UNLIMITED:
+                rollup["unlimited"] += 1
+            elif taken >= 0:
+                rollup["seats taken"] += taken
+                rollup["seats available"] += available
+
+        for rollup in rollups.values():
+            rollup["fill ratio"] = fill_ratio(rollup["seats taken"], rollup["seats available"])
+    else:
+        department_index = numpy.searchsorted(names, departments)
+
+        total_taken, total_available, unlimited, _, ratios = aggregate_arrays(
+            department_index, numpy.array(seats_taken, dtype="int64"), numpy.array(seats_available, dtype="int64"), len(names))
+
+        courses = numpy.bincount(department_index, minlength=len(names))
+        num_waitlisted = numpy.bincount(department_index, weights=waitlisted, minlength=len(names)).astype("int64")
+
+        rollups = dict(
+            (name, {
+                "courses": courses[i].item(), "waitlisted": num_waitlisted[i].item(), "unlimited": unlimited[i].item(),
+                "seats taken": total_taken[i].item(), "seats available": total_available[i].item(),
+                "fill ratio": None if numpy.isnan(ratios[i]) else ratios[i].item()
+            })
+            for i, name in enumerate(names)
+        )
+
+    for rollup in rollups.values():
+        rollup["course fill ratios"] = {}
+
+    for code, ratio in course_fill_ratios(grouped_data).items():
+        rollups[code.partition(" ")[0]]["course fill ratios"][code] = ratio
+
+    return rollups
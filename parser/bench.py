@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""Python program to benchmark the soc stages offline against recorded pages. Created by Aykan Fonseca.
+
+Usage:
+    python bench.py generate        Writes a synthetic corpus into BENCH_DIR, so no live scrape is needed.
+    python bench.py record          Downloads the current quarter's pages into BENCH_DIR.
+    python bench.py golden          Saves this run's output as the golden snapshot.
+    python bench.py [lxml]          Benchmarks (optionally with the lxml engine) and checks against the golden snapshot.
+"""
+
+# Builtins
+import json
+import os
+import random
+import re
+import sys
+import time
+
+# Local modules.
+from catalog_index import read_catalog
+import metrics
+import rows
+import soc
+import sync
+
+# Constants
+from constants import color, timer_main, SOC_URL, BENCH_DIR, BENCH_SCALE, QUARTER_PAGES
+
+SECTION_ID_REGEX = re.compile(br">\s*(\d{6})\s*<")
+
+# What the synthetic corpus is made of.
+SYNTHETIC_DEPARTMENTS = (("Computer Science &amp; Engineering", "CSE"), ("Mathematics", "MATH"), ("Ethnic Studies", "ETHN"))
+SYNTHETIC_RESTRICTIONS = ("", "JR SR ", "D ", "XFR XSO ", "FR SO ", "UD ", "")
+SYNTHETIC_NAMES = ("Gillespie, Gary", "Núñez, José", "Staff", "Kim, Ji-Won")
+SYNTHETIC_PAGES = 20
+COURSES_PER_PAGE = 6
+
+
+def pages_directory():
+    """Where the recorded pages are kept."""
+    return os.path.join(BENCH_DIR, "pages")
+
+
+def record_corpus():
+    """Downloads every page of the current quarter into BENCH_DIR/pages as 1.html, 2.html, ..."""
+
+    soc.setup()
+
+    urls = [SOC_URL + str(num) for num in range(1, soc.NUM_PAGES_TO_PARSE + 1)]
+
+    if not os.path.isdir(pages_directory()):
+        os.makedirs(pages_directory())
+
+    for page_number, page in enumerate(soc.get_data(urls), 1):
+        with open(os.path.join(pages_directory(), str(page_number) + ".html"), "wb") as file:
+            file.write(page)
+
+
+def synthetic_section(rng, section_id, meeting_type, number):
+    """A section row like the Schedule of Classes', with a random mix of the cases rows.parse_section handles."""
+
+    case = rng.randint(0, 9)
+
+    days = "TBA" if case == 0 else rng.choice(["MWF", "TuTh", "M", "WF", "Th"])
+    times = "TBA" if case == 0 else rng.choice(["8:00a-8:50a", "10:00a-10:50a", "2:00p-3:20p", "5:00p-7:50p"])
+    place = ["TBA", "TBA"] if case in (0, 1) else [rng.choice(["CENTR", "WLH", "PCYNH"]), str(rng.randint(100, 2200))]
+
+    name = rng.choice(SYNTHETIC_NAMES)
+    name = name if name == "Staff" else '<a href="mailto:' + name.partition(",")[0].lower() + '@ucsd.edu">' + name + "</a>"
+
+    if case == 2:
+        seats = ["FULL Waitlist(" + str(rng.randint(1, 30)) + ")", str(rng.randint(50, 200))]
+    elif case == 3:
+        seats = ["Unlim"]
+    elif case == 4:
+        seats = ["Cancelled"]
+    else:
+        seats = [str(rng.randint(0, 100)), str(rng.randint(100, 200))]
+
+    cells = ["", "", section_id, meeting_type, number, days, times] + place + [name] + seats
+
+    return '<tr class="sectxt">' + "\n".join("<td>" + cell + "</td>" for cell in cells) + "</tr>"
+
+
+def synthetic_page(rng, page_number):
+    """One page of COURSES_PER_PAGE courses. Every third page starts a department, so departments span pages."""
+
+    lines = ['<html><head><meta http-equiv="Content-Type" content="text/html; charset=UTF-8"></head><body><table>']
+
+    if page_number % 3 == 1:
+        department = SYNTHETIC_DEPARTMENTS[(page_number // 3) % len(SYNTHETIC_DEPARTMENTS)]
+        lines.append('<tr><td colspan="13"><h2>' + department[0] + " (" + department[1] + " )</h2></td></tr>")
+
+    for course in range(COURSES_PER_PAGE):
+        restrictions = SYNTHETIC_RESTRICTIONS[(page_number + course) % len(SYNTHETIC_RESTRICTIONS)]
+        code = str(page_number * 10 + course)
+        base = 900000 + page_number * 100 + course * 10
+
+        lines.append('<tr><td class="crsheader">' + restrictions + '</td>\n<td class="crsheader">' + code + "</td>\n" +
+                     '<td class="crsheader"><span>Course Title ' + code + "</span> ( 4 Units)</td>\n<td>Prereq</td></tr>")
+        lines.append(synthetic_section(rng, str(base), "LE", "A00"))
+
+        # Discussions without an id belong to the lecture before them.
+        for discussion in range(1, rng.randint(2, 4)):
+            section_id = str(base + discussion) if rng.randint(0, 3) else ""
+            lines.append(synthetic_section(rng, section_id, "DI", "A0" + str(discussion)))
+
+        if rng.randint(0, 1):
+            lines.append('<tr class="nonenrtxt"><td>FI</td>\n<td>12/10/2018</td>\n<td>M</td>\n<td>11:30a-2:29p</td>\n<td>CENTR</td>\n<td>115</td></tr>')
+
+    lines.append("</table></body></html>")
+
+    return "\n".join(lines).encode("utf_8")
+
+
+def generate_corpus(num_pages=SYNTHETIC_PAGES, seed=2019):
+    """Writes a synthetic corpus into BENCH_DIR/pages. The same seed always gives the same pages."""
+
+    rng = random.Random(seed)
+
+    if not os.path.isdir(pages_directory()):
+        os.makedirs(pages_directory())
+
+    for page_number in range(1, num_pages + 1):
+        with open(os.path.join(pages_directory(), str(page_number) + ".html"), "wb") as file:
+            file.write(synthetic_page(rng, page_number))
+
+
+def load_corpus():
+    """Returns the recorded pages in page order."""
+
+    names = sorted(os.listdir(pages_directory()), key=lambda name: int(name.partition(".")[0]))
+    pages = []
+
+    for name in names:
+        with open(os.path.join(pages_directory(), name), "rb") as file:
+            pages.append(file.read())
+
+    return pages
+
+
+def scale_up(pages, factor):
+    """Repeats pages factor times, shifting the section ids of each copy so they stay unique."""
+
+    scaled_pages = list(pages)
+
+    for copy in range(1, factor):
+        shift = lambda match: match.group(0).replace(match.group(1), ("%06d" % ((int(match.group(1)) + copy * 104729) % 1000000)).encode("ascii"))
+        scaled_pages.extend(SECTION_ID_REGEX.sub(shift, page) for page in pages)
+
+    return scaled_pages
+
+
+def scale_factor(num_pages, scale=BENCH_SCALE):
+    """Copies of a corpus of num_pages needed for scale quarters of QUARTER_PAGES pages. Ex. 20 pages => 100 copies."""
+
+    return max(1, -(-scale * QUARTER_PAGES // num_pages))
+
+
+def benchmark(pages, catalog, engine):
+    """Runs stages 3 through 5 on pages and prints their throughput and memory. Returns the final data."""
+
+    first_stage = len(metrics.STAGES)
+
+    teacher_email_map, raw_data = soc.extract_data(pages, engine)
+    formatted_data = soc.format_data(raw_data)
+    parsed_data = soc.parse_data(formatted_data, catalog)
+    final_data = soc.export_data(soc.compute_meta_data(parsed_data))
+
+    seconds = dict((stage["stage"], stage["wall seconds"]) for stage in metrics.STAGES[first_stage:])
+    section_rows_per_second = benchmark_rows(raw_data)
+    total_seconds = sum(seconds.values())
+    num_rows = sum(len(page) for page in raw_data)
+
+    print(color.BOLD + color.DARKCYAN + "### Results (" + str(len(pages)) + " pages, " + engine + ") ###" + color.END)
+    print("- Extract: " + str(int(len(pages) / seconds["extract_data"])) + " pages/s.")
+    print("- Filter: " + str(int(num_rows / seconds["format_data"])) + " rows/s.")
+    print("- Parse: " + str(int(len(formatted_data) / seconds["parse_data"])) + " courses/s, " +
+          str(int(section_rows_per_second)) + " section rows/s.")
+    print("- Group: " + str(int(len(parsed_data) / seconds["compute_meta_data"])) + " courses/s.")
+    print("- Overall: " + str(int(len(pages) / total_seconds)) + " pages/s, " +
+          str(int(len(formatted_data) / total_seconds)) + " courses/s.")
+    # Tracing allocations would skew the timings, so this is the process' peak resident memory so far.
+    print("- Peak memory: " + str(metrics.peak_rss() // (1024 * 1024)) + " MB.\n")
+
+    return final_data
+
+
+def benchmark_rows(raw_data):
+    """Returns how many section rows per second rows.parse_section handles."""
+
+    section_rows = [item for page in raw_data for item in page if item.startswith("....")]
+
+    start = time.time()
+    for item in section_rows:
+        rows.parse_section(item)
+
+    return len(section_rows) / max(time.time() - start, 1e-9)
+
+
+def golden_path():
+    """Where the expected output of the recorded pages is kept."""
+    return os.path.join(BENCH_DIR, "golden.json")
+
+
+def check_golden(final_data):
+    """Compares final_data against the golden snapshot. Returns True if they match."""
+
+    with open(golden_path()) as file:
+        golden = json.load(file)
+
+    final_data = sync.normalize(final_data)
+
+    for code in sorted(set(golden) | set(final_data)):
+        if golden.get(code) != final_data.get(code):
+            print(color.BOLD + color.RED + "- Output differs from the golden snapshot, first at " + code + "." + color.END)
+            return False
+
+    print(color.BOLD + color.GREEN + "- Output matches the golden snapshot." + color.END)
+
+    return True
+
+
+@timer_main
+def main():
+    if "record" in sys.argv:
+        record_corpus()
+        return
+
+    if "generate" in sys.argv:
+        generate_corpus()
+        return
+
+    engine = "lxml" if "lxml" in sys.argv else "bs4"
+    pages = load_corpus()
+
+    # A catalog snapshot keeps the golden output stable. Without one, courses get the default description.
+    catalog_path = os.path.join(BENCH_DIR, "catalog.json")
+    catalog = read_catalog(catalog_path) if os.path.exists(catalog_path) else {}
+
+    final_data = benchmark(pages, catalog, engine)
+
+    if "golden" in sys.argv:
+        with open(golden_path(), "w") as file:
+            json.dump(sync.normalize(final_data), file, sort_keys=True)
+    else:
+        check_golden(final_data)
+
+    print("- Scaling up to " + str(BENCH_SCALE) + " quarters of " + str(QUARTER_PAGES) + " pages.")
+
+    benchmark(scale_up(pages, scale_factor(len(pages))), catalog, engine)
+
+
+if __name__ == "__main__":
+    main()
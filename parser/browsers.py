@@ -0,0 +1,223 @@
+"""Python file used to start headless browsers only when they are needed and share a few of them. Created by Aykan Fonseca."""
+
+# Builtins
+import atexit
+import contextlib
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# Constants
+from constants import BROWSER, BROWSER_POOL_SIZE
+
+# Global Variables.
+POOL = None # The shared pool, created by the first get_pool. See close_pool.
+POOL_LOCK = threading.Lock()
+
+
+def make_driver(name=BROWSER):
+    """Starts a headless browser. Selenium is imported here, so importing this file needs neither it nor a browser."""
+
+    from selenium import webdriver
+
+    if name == "phantomjs":
+        return webdriver.PhantomJS()
+
+    if name == "chrome":
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless")
+        return webdriver.Chrome(options=options)
+
+    if name == "firefox":
+        options = webdriver.FirefoxOptions()
+        options.add_argument("--headless")
+        return webdriver.Firefox(options=options)
+
+    raise ValueError("Unknown browser: " + name + ". Use phantomjs, chrome, or firefox.")
+
+
+class BrowserPool(object):
+    """Up to size browsers, each started the first time it is needed and reused after. Ex.
+
+        with BrowserPool(3) as pool:
+            with pool.driver() as driver:
+                driver.get(PLANS_URL)
+
+    A thread asking for a browser while all size of them are busy waits for one to be handed back.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, factory=make_driver):
+        self.size = size
+        self.factory = factory
+        self.idle = queue.Queue()
+        self.drivers = [] # Every browser started and not yet quit.
+        self.num_starting = 0
+        self.lock = threading.Lock()
+        self.is_closed = False
+
+    def start(self, count=None):
+        """Starts count browsers (all size of them by default) at once, rather than one by one on first use."""
+
+        count = self.size if count is None else count
+        num_reserved = 0
+
+        while num_reserved < count and self.reserve():
+            num_reserved += 1
+
+        errors = []
+
+        def start_one():
+            try:
+                self.idle.put(self.new_driver())
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=start_one) for _ in range(num_reserved)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+
+    def reserve(self):
+        """Saves a place for one more browser. Returns False if the pool already holds size browsers."""
+
+        with self.lock:
+            if self.is_closed:
+                raise RuntimeError("The browser pool is closed.")
+
+            if len(self.drivers) + self.num_starting >= self.size:
+                return False
+
+            self.num_starting += 1
+
+            return True
+
+    def new_driver(self):
+        """Starts the browser of a reserved place. Browsers take seconds to start, so they start outside the lock."""
+
+        try:
+            driver = self.factory()
+        except Exception:
+            with self.lock:
+                self.num_starting -= 1
+            raise
+
+        with self.lock:
+            self.num_starting -= 1
+            is_closed = self.is_closed
+
+            if not is_closed:
+                self.drivers.append(driver)
+
+        # The pool closed while this browser was starting.
+        if is_closed:
+            driver.quit()
+            raise RuntimeError("The browser pool is closed.")
+
+        return driver
+
+    def acquire(self):
+        """Returns an idle browser, starting one if the pool isn't full, otherwise waiting for one."""
+
+        while True:
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            if self.reserve():
+                return self.new_driver()
+
+            # Wakes up now and then, in case a discarded browser freed a place.
+            try:
+                return self.idle.get(timeout=1)
+            except queue.Empty:
+                pass
+
+    def release(self, driver):
+        """Hands a browser back for the next acquire. A discarded browser, or any after close, is not kept."""
+
+        with self.lock:
+            is_kept = driver in self.drivers
+
+        if is_kept:
+            self.idle.put(driver)
+
+    def discard(self, driver):
+        """Quits a browser that is broken, so the pool starts a new one in its place."""
+
+        with self.lock:
+            if driver in self.drivers:
+                self.drivers.remove(driver)
+
+        try:
+            driver.quit()
+        except Exception:
+            pass # It is gone either way.
+
+    @contextlib.contextmanager
+    def driver(self):
+        """A browser for the duration of a with block."""
+
+        driver = self.acquire()
+
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Quits every browser. Browsers still in use are quit too, so only close once the work is done."""
+
+        with self.lock:
+            self.is_closed = True
+            drivers, self.drivers = self.drivers, []
+            self.idle = queue.Queue()
+
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+def get_pool():
+    """Returns the shared pool. No browser starts until one is asked for."""
+
+    global POOL
+
+    with POOL_LOCK:
+        if POOL is None:
+            POOL = BrowserPool()
+
+        return POOL
+
+
+def close_pool():
+    """Quits every browser of the shared pool. The next get_pool makes a new one."""
+
+    global POOL
+
+    with POOL_LOCK:
+        pool, POOL = POOL, None
+
+    if pool is not None:
+        pool.close()
+
+
+# A run that dies should not leave browser processes behind.
+atexit.register(close_pool)
@@ -0,0 +1,174 @@
+"""Python file used to cache HTTP responses on disk between runs. Created by Aykan Fonseca."""
+
+# Builtins
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Constants
+from constants import CACHE_DIR, CACHE_MODE, CACHE_MAX_BYTES
+
+# Global Variables.
+LOCK = threading.Lock()
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a request has no cached response."""
+    pass
+
+
+def request_key(method, url, data=None, vary=None):
+    """Identifies a request by its method, url, post data, and any extra state the response depends on."""
+
+    parts = [method, url, json.dumps(data, sort_keys=True), json.dumps(vary, sort_keys=True)]
+
+    return hashlib.sha1("\n".join(parts).encode("utf_8")).hexdigest()
+
+
+def entry_path(key):
+    """Path to the metadata of a request."""
+    return os.path.join(CACHE_DIR, "entries", key + ".json")
+
+
+def body_path(digest):
+    """Path to a response body. Bodies are named by the hash of their content, so identical pages are stored once."""
+    return os.path.join(CACHE_DIR, "bodies", digest)
+
+
+def write_file(path, content):
+    """Writes content to a temporary file and renames it over path, so readers never see a partial file."""
+
+    directory = os.path.dirname(path)
+
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            pass # Another thread created it first.
+
+    temp_path = path + "." + str(threading.current_thread().ident) + ".tmp"
+
+    with open(temp_path, "wb") as file:
+        file.write(content)
+
+    os.rename(temp_path, path)
+
+
+def read_entry(key):
+    """Returns the metadata of a cached request if both it and its body exist."""
+
+    try:
+        with open(entry_path(key)) as file:
+            entry = json.load(file)
+    except (IOError, OSError, ValueError):
+        return None
+
+    return entry if os.path.exists(body_path(entry["body"])) else None
+
+
+def read_body(entry):
+    """Returns a cached body and marks it as recently used for eviction."""
+
+    path = body_path(entry["body"])
+
+    with open(path, "rb") as file:
+        content = file.read()
+
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+    return content
+
+
+def store(key, response):
+    """Saves a response's body and its validators (ETag, Last-Modified)."""
+
+    digest = hashlib.sha1(response.content).hexdigest()
+
+    if not os.path.exists(body_path(digest)):
+        write_file(body_path(digest), response.content)
+
+    entry = {
+        "body": digest,
+        "etag": response.headers.get("ETag"),
+        "last modified": response.headers.get("Last-Modified"),
+        "time": int(time.time())
+    }
+
+    write_file(entry_path(key), json.dumps(entry).encode("utf_8"))
+
+
+def fetch(session, url, headers=None, data=None, vary=None):
+    """Returns the body of url, posting data if given. Cached GETs are revalidated with conditional requests.
+
+    session can be a requests.Session or the requests module itself. vary is any extra state the response
+    depends on, like the search that paginated results belong to.
+    """
+
+    method = "GET" if data is None else "POST"
+
+    if CACHE_MODE == "off":
+        return session.request(method, url, headers=headers, data=data).content
+
+    key = request_key(method, url, data, vary)
+    entry = read_entry(key)
+
+    if CACHE_MODE == "offline":
+        if entry is None:
+            raise CacheMiss(method + " " + url)
+
+        return read_body(entry)
+
+    request_headers = dict(headers or {})
+
+    # Only GETs are revalidated. Posts change state on the server, so we always send them.
+    if entry is not None and method == "GET":
+        if entry["etag"]:
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry["last modified"]:
+            request_headers["If-Modified-Since"] = entry["last modified"]
+
+    response = session.request(method, url, headers=request_headers, data=data)
+
+    if response.status_code == 304 and entry is not None:
+        return read_body(entry)
+
+    if response.status_code == 200:
+        store(key, response)
+
+    return response.content
+
+
+def evict(max_bytes=CACHE_MAX_BYTES):
+    """Deletes the least recently used bodies until the cache fits in max_bytes, along with their metadata."""
+
+    bodies_directory = os.path.join(CACHE_DIR, "bodies")
+    entries_directory = os.path.join(CACHE_DIR, "entries")
+
+    if not os.path.isdir(bodies_directory):
+        return
+
+    with LOCK:
+        bodies = []
+        for name in os.listdir(bodies_directory):
+            stat = os.stat(os.path.join(bodies_directory, name))
+            bodies.append((stat.st_mtime, stat.st_size, name))
+
+        total_bytes = sum(size for _, size, _ in bodies)
+
+        # Oldest first.
+        for _, size, name in sorted(bodies):
+            if total_bytes <= max_bytes:
+                break
+
+            os.remove(os.path.join(bodies_directory, name))
+            total_bytes -= size
+
+        # Metadata pointing to a deleted body is useless.
+        for name in os.listdir(entries_directory):
+            if not read_entry(name[:-len(".json")]):
+                os.remove(os.path.join(entries_directory, name))
@@ -6,13 +6,15 @@ import time
 # Pip install packages.
 from bs4 import BeautifulSoup
 from firebase import firebase
-import requests
+
+# Local modules.
+import transport
 
 # Constants
 from constants import color, timer, timer_main, FIREBASE_DB, FIREBASE_DB2, CAPE_URL, HEADERS
 
 # Global Variables.
-SESSION = requests.Session()
+SESSION = transport.Session()
 
 
 @timer
@@ -0,0 +1,55 @@
+"""Python file used to load the course catalog into memory before parsing. Created by Aykan Fonseca."""
+
+# Builtins
+import json
+import os
+
+# Constants
+from constants import color, timer, FIREBASE_DB, CATALOG_SNAPSHOT
+
+
+def fetch_catalog():
+    """Fetches the entire catalog from Firebase in a single request. The firebase client is imported here, so importing
+    this file (and soc) works where the client does not. Ex. it fails to import on Python 3.7+."""
+
+    from firebase import firebase
+
+    database = firebase.FirebaseApplication(FIREBASE_DB)
+
+    return database.get("/catalog", None) or {}
+
+
+def read_catalog(path):
+    """Reads a catalog snapshot written by write_catalog."""
+
+    with open(path) as file:
+        return json.load(file)
+
+
+def write_catalog(catalog, path):
+    """Writes the catalog to a local snapshot file."""
+
+    with open(path, "w") as file:
+        json.dump(catalog, file, sort_keys=True)
+
+
+@timer
+def load_catalog(path=CATALOG_SNAPSHOT):
+    """Returns the catalog keyed by course code. Ex. catalog["CSE 100"]["title"]."""
+
+    print(color.BOLD + color.DARKCYAN + "### Loading Catalog ###" + color.END)
+
+    if path and os.path.exists(path):
+        print("- Reading catalog snapshot " + path + ".")
+        catalog = read_catalog(path)
+    else:
+        print("- Fetching catalog from database.")
+        catalog = fetch_catalog()
+
+    print("- Number of catalog courses: " + str(len(catalog)) + ".")
+
+    return catalog
+
+
+if __name__ == "__main__":
+    write_catalog(fetch_catalog(), CATALOG_SNAPSHOT or "catalog.json")
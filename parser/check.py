@@ -0,0 +1,93 @@
+"""Python program to check that alternative code paths give identical results. Created by Aykan Fonseca."""
+
+# Builtins
+import multiprocessing
+
+# Local modules.
+import cache
+from catalog_index import load_catalog
+from dump import write_dump
+from records import course_to_dict
+import soc
+
+# Constants
+from constants import color, timer, timer_main, SOC_URL, CATALOG_SNAPSHOT
+
+
+def report(name, is_identical):
+    """Prints whether a check passed."""
+
+    if is_identical:
+        print(color.BOLD + color.GREEN + "- " + name + ": identical." + color.END)
+    else:
+        print(color.BOLD + color.RED + "- " + name + ": DIFFERENT." + color.END)
+
+
+@timer
+def check_extract(pages):
+    """Extracts pages with both engines and prints the first page where they differ. Returns True if none do."""
+
+    print(color.BOLD + color.DARKCYAN + "### Checking extraction engines (bs4 vs lxml) ###" + color.END)
+
+    bs4_email_map, lxml_email_map = {}, {}
+    bs4_pages = soc.iter_extract(pages, bs4_email_map, "bs4")
+    lxml_pages = soc.iter_extract(pages, lxml_email_map, "lxml")
+
+    for page_number, (bs4_rows, lxml_rows) in enumerate(zip(bs4_pages, lxml_pages), 1):
+        if bs4_rows != lxml_rows:
+            print("- First difference on page " + str(page_number) + ".")
+            report("Rows", False)
+            return False
+
+    report("Rows", True)
+    report("Teacher emails", bs4_email_map == lxml_email_map)
+
+    return bs4_email_map == lxml_email_map
+
+
+@timer
+def check_parse(formatted_data, catalog, processes=max(2, multiprocessing.cpu_count())):
+    """Parses formatted_data in one process and in a pool of at least 2. Returns True if the outputs are identical."""
+
+    print(color.BOLD + color.DARKCYAN + "### Checking parsing (1 vs " + str(processes) + " processes) ###" + color.END)
+
+    serial_data = soc.parse_data(formatted_data, catalog, 1)
+    parallel_data = soc.parse_data(formatted_data, catalog, processes)
+
+    # Diff these by hand with: python dump.py check.jsonl.gz check_multiprocessing.jsonl.gz
+    write_dump(soc.export_data(soc.compute_meta_data(serial_data)), "check.jsonl.gz")
+    write_dump(soc.export_data(soc.compute_meta_data(parallel_data)), "check_multiprocessing.jsonl.gz")
+
+    # Compare the printed form, so even dictionary ordering has to match.
+    is_identical = str([course_to_dict(course) for course in serial_data]) == str([course_to_dict(course) for course in parallel_data])
+
+    report("Parsed courses", is_identical)
+
+    return is_identical
+
+
+@timer_main
+def main():
+    # Replay the last scrape from the cache so every check sees the same pages.
+    cache.CACHE_MODE = "offline"
+
+    soc.setup()
+
+    urls = [SOC_URL + str(num) for num in range(1, soc.NUM_PAGES_TO_PARSE + 1)]
+
+    pages = soc.get_data(urls)
+
+    check_extract(pages)
+
+    teacher_email_map, raw_data = soc.extract_data(pages)
+
+    formatted_data = soc.format_data(raw_data)
+
+    # Stay offline unless there is a catalog snapshot. Parsing does not depend on catalog contents.
+    catalog = load_catalog() if CATALOG_SNAPSHOT else {}
+
+    check_parse(formatted_data, catalog)
+
+
+if __name__ == "__main__":
+    main()
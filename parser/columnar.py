@@ -0,0 +1,169 @@
+"""Python file used to export the sections of a quarter as columns that analytics can scan without parsing. Created by Aykan Fonseca."""
+
+# Builtins
+import json
+import os
+import sys
+
+# Pip install packages. NumPy is optional: without it the columnar export is skipped.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Local modules.
+from rows import DAYS_REGEX
+from seats import encode_seats, UNLIMITED
+
+# Constants
+from constants import color, timer, COLUMNS_DIR
+
+# Each day is a bit, so a meeting pattern is one small integer. Ex. MWF => 1 + 4 + 16 = 21
+DAY_BITS = {"M": 1, "Tu": 2, "W": 4, "Th": 8, "F": 16, "S": 32, "Su": 64}
+NO_TIME = -1 # The minutes of a TBA time.
+NO_ID = -1 # The id of a section without one.
+
+# Every column and its type, one row per section. Text columns hold indices into the vocabulary of the same name.
+COLUMNS = (
+    ("code", "int32"), ("id", "int32"), ("meeting_type", "int16"), ("days", "uint8"),
+    ("start", "int16"), ("end", "int16"), ("building", "int32"), ("room", "int32"),
+    ("name", "int32"), ("seats_taken", "int32"), ("seats_available", "int32")
+)
+TEXT_COLUMNS = ("code", "meeting_type", "building", "room", "name")
+
+
+def encode_days(days):
+    """Ex. "MWF" => 21, "-" => 0."""
+
+    return sum(DAY_BITS.get(day, 0) for day in DAYS_REGEX.findall(days))
+
+
+def decode_days(bits):
+    """Reverses encode_days. Ex. 21 => "MWF"."""
+
+    return "".join(day for day, bit in sorted(DAY_BITS.items(), key=lambda item: item[1]) if bits & bit)
+
+
+def time_to_minutes(time):
+    """Ex. "17:30" => 1050, "TBA" => -1.
+
+    Times come from rows.convert_to_military, which writes 12:00p as "24:00". Those are noon, not midnight.
+    """
+
+    if time == "TBA":
+        return NO_TIME
+
+    hours, _, minutes = time.partition(":")
+    hours = 12 if int(hours) == 24 else int(hours)
+
+    return hours * 60 + int(minutes)
+
+
+def columns_directory(quarter):
+    """Where the columns of quarter are kept. One .npy file per column plus vocabulary.json."""
+
+    return os.path.join(COLUMNS_DIR, quarter)
+
+
+def build_columns(grouped_data):
+    """Returns ({column: [value per section]}, {text column: [text per index]}) from compute_meta_data's groups."""
+
+    columns = dict((name, []) for name, _ in COLUMNS)
+    vocabulary = dict((name, []) for name in TEXT_COLUMNS)
+    indices = dict((name, {}) for name in TEXT_COLUMNS)
+
+    def index(name, text):
+        if text not in indices[name]:
+            indices[name][text] = len(vocabulary[name])
+            vocabulary[name].append(text)
+
+        return indices[name][text]
+
+    for code in sorted(grouped_data):
+        code_index = index("code", code)
+
+        for course in grouped_data[code].courses:
+            for section in course.sections:
+                columns["code"].append(code_index)
+                columns["id"].append(int(section.id) if section.id != "-" else NO_ID)
+                columns["meeting_type"].append(index("meeting_type", section.meeting_type))
+                columns["days"].append(encode_days(section.days))
+                columns["start"].append(time_to_minutes(section.start_time))
+                columns["end"].append(time_to_minutes(section.end_time))
+                columns["building"].append(index("building", section.building))
+                columns["room"].append(index("room", section.room))
+                columns["name"].append(index("name", section.name))
+                columns["seats_taken"].append(encode_seats(section.seats_taken))
+                columns["seats_available"].append(encode_seats(section.seats_available))
+
+    return columns, vocabulary
+
+
+@timer
+def export_columns(grouped_data, quarter):
+    """Writes every section of quarter as memory-mappable columns. Read them back with load_columns."""
+
+    print(color.BOLD + color.DARKCYAN + "### Exporting columns ###" + color.END)
+
+    if numpy is None:
+        print("- NumPy is not installed, skipping.")
+        return
+
+    columns, vocabulary = build_columns(grouped_data)
+    directory = columns_directory(quarter)
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    for name, dtype in COLUMNS:
+        numpy.save(os.path.join(directory, name + ".npy"), numpy.array(columns[name], dtype=dtype))
+
+    with open(os.path.join(directory, "vocabulary.json"), "w") as file:
+        json.dump(vocabulary, file, sort_keys=True)
+
+    print("- Number of sections: " + str(len(columns["code"])) + ".")
+
+
+def load_columns(quarter, mmap_mode="r"):
+    """Returns ({column: array}, {text column: [text per index]}). Columns are memory-mapped unless mmap_mode is None."""
+
+    directory = columns_directory(quarter)
+
+    columns = dict((name, numpy.load(os.path.join(directory, name + ".npy"), mmap_mode=mmap_mode)) for name, _ in COLUMNS)
+
+    with open(os.path.join(directory, "vocabulary.json")) as file:
+        vocabulary = json.load(file)
+
+    return columns, vocabulary
+
+
+def open_sections(columns, vocabulary, meeting_type, after):
+    """Returns the rows of open sections of meeting_type starting at or after a time. Ex. open_sections(columns, vocabulary, "LE", "17:00")
+
+    Open means unlimited, or fewer seats taken than available, which is the opposite of waitlisted.
+    """
+
+    if meeting_type not in vocabulary["meeting_type"]:
+        return numpy.array([], dtype="int64")
+
+    seats_taken, seats_available = columns["seats_taken"], columns["seats_available"]
+
+    is_open = (seats_available == UNLIMITED) | ((seats_taken >= 0) & (seats_taken < seats_available))
+    is_match = (columns["meeting_type"] == vocabulary["meeting_type"].index(meeting_type)) & (columns["start"] >= time_to_minutes(after))
+
+    return numpy.nonzero(is_open & is_match)[0]
+
+
+if __name__ == "__main__":
+    # Ex. python columnar.py WI19 LE 17:00
+    quarter, meeting_type, after = (sys.argv[1:] + ["LE", "17:00"])[:3]
+
+    columns, vocabulary = load_columns(quarter)
+    rows = open_sections(columns, vocabulary, meeting_type, after)
+
+    print("- Open " + meeting_type + " sections at or after " + after + ": " + str(len(rows)) + ".")
+
+    for row in rows[:20]:
+        print("- " + vocabulary["code"][columns["code"][row]] + " " + "%06d" % columns["id"][row] + " " + decode_days(columns["days"][row]) +
+              " " + vocabulary["building"][columns["building"][row]] + " " + vocabulary["room"][columns["room"][row]] +
+              " " + str(columns["seats_taken"][row]) + "/" + str(columns["seats_available"][row]))
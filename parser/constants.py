@@ -1,17 +1,81 @@
 """Python file used to hold common constants and settings. Created by Aykan Fonseca."""
 
+import collections
+import os
 import time
 
+import metrics
+
 # Databases
 FIREBASE_DB = "https://winter-2019-rd.firebaseio.com/"
 FIREBASE_DB2 = "https://winter-test-c46cc.firebaseio.com/"
+CATALOG_SNAPSHOT = None # Path to a local copy of the catalog. None fetches it from FIREBASE_DB.
 
 # URLS
 SOC_URL = "https://act.ucsd.edu/scheduleOfClasses/scheduleOfClassesStudentResult.htm?page="
+SOC_FORM_URL = "https://act.ucsd.edu/scheduleOfClasses/scheduleOfClassesStudent.htm"
 CAPE_URL = "http://cape.ucsd.edu/responses/Results.aspx?"
 PLANS_URL = "https://plans.ucsd.edu"
+PLANS_PATH = "plans.jsonl.gz" # Where plans.py writes every plan it crawled, one per line.
 SUBJECTS_URL = "http://blink.ucsd.edu/instructors/courses/schedule-of-classes/subject-codes.html"
 
+# Concurrency
+MAX_WORKERS = 8 # Number of pages downloaded at once. 1 downloads serially.
+MAX_REQUESTS_PER_HOST = 4 # Simultaneous requests to a single host at the start. transport.py adapts it as the host copes.
+MAX_CONCURRENCY_PER_HOST = 8 # The most simultaneous requests to a single host, however well it copes.
+PARSE_PROCESSES = 1 # Number of processes parsing courses. 1 parses in this process.
+SHARD_WORKERS = 4 # Number of departments scraped at once by a sharded scrape (soc.py --shards).
+
+# Transport
+REQUEST_TIMEOUT = (5, 30) # Seconds to connect and to wait for each read of a response.
+REQUEST_RETRIES = 4 # Times a timed out, reset, throttled, or 5xx request is resent before giving up.
+BACKOFF_BASE = 0.5 # Seconds of the first retry's backoff, doubled for each retry after it.
+BACKOFF_MAX = 30 # Most seconds to wait before a retry.
+LATENCY_SPIKE_FACTOR = 3 # A request this many times slower than usual slows down its host like an error.
+
+# HTTP cache
+CACHE_DIR = "cache"
+CACHE_MODE = "online" # "online" revalidates cached pages, "offline" replays them without the network, "off" skips the cache.
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Database sync
+DELTA_SYNC = True # Upload only what changed since the last upload. False re-uploads every course.
+SYNC_DIR = "snapshots" # Where the last uploaded data for each quarter is kept.
+UPLOAD_BATCH_SIZE = 500 # Number of paths (courses or changed values) per update request.
+UPLOAD_WORKERS = 4 # Number of update requests sent at once.
+UPLOAD_RETRIES = 3 # Times a failed update request is resent before giving up.
+UPLOAD_TIMEOUT = 60 # Seconds to wait for the database to answer an update request.
+
+# Benchmarks
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench") # Holds the pages (pages/1.html, ...), an optional catalog.json, and golden.json.
+QUARTER_PAGES = 200 # Result pages of a real quarter's search, roughly.
+BENCH_SCALE = 10 # The scaled up corpus holds this many quarters of pages (BENCH_SCALE * QUARTER_PAGES).
+
+# Browsers
+BROWSER = "phantomjs" # "phantomjs", "chrome", or "firefox". Only plans.py, and main.py without a search form, need one.
+BROWSER_POOL_SIZE = 3 # Most browsers running at once. See browsers.py.
+
+# Sharded scrapes
+SHARDS_DIR = "shards" # Where the output and status of each department of a sharded scrape is kept.
+
+# Journal
+JOURNAL_DIR = "journal" # Where the journal of an unfinished scrape is kept until it finishes. See journal.py.
+
+# Seat history
+SEATS_DIR = "seats" # Where the seat history of each quarter is kept. Compact it offline with: python seats.py compact WI19
+
+# Columnar export
+COLUMNS_DIR = "columns" # Where the sections of each quarter are exported as NumPy columns. See columnar.py.
+
+# Course dumps
+DUMP_PATH = "check.jsonl.gz" # Where soc.main writes every course, one per line. Ends in .gz, .zst, or .jsonl.
+DEPARTMENTS_PATH = "departments.json" # Where soc.main writes the seat totals and fill ratios of every department. See aggregate.department_rollups.
+
+# Parsing
+EXTRACT_ENGINE = "bs4" # "bs4" or "lxml". lxml skips BeautifulSoup's tree and is several times faster.
+RESTRICTIONS_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "restrictions.json") # Restriction phrases by code string. See restrictions.py.
+RESTRICTIONS_LEARNED = os.path.join(CACHE_DIR, "restrictions.json") # Phrases found while parsing that the committed table lacks. Not tracked.
+
 
 class color:
     PURPLE = "\033[95m"
@@ -27,16 +91,39 @@ class color:
 
 # Timing
 
+# Every timed function is also recorded by metrics, and a report is written when main finishes.
+METRICS_PATH = "metrics.json" # Ends in .prom for Prometheus text. None skips the report.
+PROFILE_STAGES = set() # Names of timed functions to run under cProfile. Ex. set(["parse_data", "get_data"])
+PROFILE_DIR = "profiles" # Where the cProfile stats of PROFILE_STAGES go, one .prof file per function.
+MEMOIZE_SIZE = 4096 # Most results a memoized function keeps.
+
+
+def profile_path(name):
+    """Where the cProfile stats of name go, or None if it isn't profiled."""
+
+    if name not in PROFILE_STAGES:
+        return None
+
+    if not os.path.isdir(PROFILE_DIR):
+        os.makedirs(PROFILE_DIR)
+
+    return os.path.join(PROFILE_DIR, name + ".prof")
+
 
 def timer_main(func):
     """A decorator function used specifically to time main()'s execution"""
 
     def wrapper(*args, **kw):
+        metrics.reset()
         start = time.time()
-        result = func(*args, **kw)
+        result = metrics.measure(func.__name__, func, args, kw, profile_path(func.__name__))
         end = time.time()
         print(color.BOLD + color.PURPLE + "### Total Time taken: " +
               str(end - start) + " seconds" + "\n" + color.END)
+
+        if METRICS_PATH:
+            metrics.write_report(METRICS_PATH)
+
         return result
 
     return wrapper
@@ -47,7 +134,7 @@ def timer(func):
 
     def wrapper(*args, **kw):
         start = time.time()
-        result = func(*args, **kw)
+        result = metrics.measure(func.__name__, func, args, kw, profile_path(func.__name__))
         end = time.time()
         print(color.BOLD + color.GREEN + "- Time taken: " +
               str(end - start) + " seconds" + "\n" + color.END)
@@ -56,6 +143,45 @@ def timer(func):
     return wrapper
 
 
+def memoize(func):
+    """A decorator function used to cache the results of a pure function of one argument.
+
+    Keeps the latest MEMOIZE_SIZE results. Hits and misses are counted in wrapper.hits and wrapper.misses,
+    and show up in the metrics report.
+    """
+
+    results = {}
+    arguments = collections.deque() # In the order they were cached, so the oldest is evicted first.
+
+    def wrapper(argument):
+        try:
+            result = results[argument]
+        except KeyError:
+            wrapper.misses += 1
+        else:
+            wrapper.hits += 1
+            return result
+
+        result = func(argument)
+
+        if len(arguments) >= MEMOIZE_SIZE:
+            results.pop(arguments.popleft(), None)
+
+        results[argument] = result
+        arguments.append(argument)
+
+        return result
+
+    wrapper.hits = 0
+    wrapper.misses = 0
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+
+    metrics.CACHES[func.__name__] = wrapper
+
+    return wrapper
+
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36",
     "Cache-Control": "no-cache",
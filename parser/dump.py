@@ -0,0 +1,105 @@
+"""Python file used to write, read, and diff course dumps, one JSON course per line. Created by Aykan Fonseca."""
+
+# Builtins
+import gzip
+import io
+import json
+import sys
+
+# Pip install packages. zstandard is optional: only .zst dumps need it.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Constants
+from constants import color
+
+
+def open_dump(path, mode):
+    """Opens a dump for reading ("rb") or writing ("wb"). Ex. "check.jsonl.gz" is gzipped, "check.jsonl.zst" is zstd."""
+
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise ImportError("zstandard is needed for " + path + ". Use .gz or .jsonl instead.")
+
+        if mode == "wb":
+            return zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb")))
+
+    return open(path, mode)
+
+
+def write_dump(final_data, path):
+    """Writes {code: course} as one line per course, sorted by code. Ex. {"code": "CSE 100", "course": {...}}"""
+
+    with open_dump(path, "wb") as file:
+        for code in sorted(final_data):
+            line = json.dumps({"code": code, "course": final_data[code]}, sort_keys=True, separators=(",", ":"))
+            file.write(line.encode("utf_8") + b"\n")
+
+
+def read_dump(path):
+    """Yields (code, course) from a dump, one line at a time."""
+
+    with open_dump(path, "rb") as file:
+        for line in file:
+            if line.strip():
+                entry = json.loads(line.decode("utf_8"))
+                yield entry["code"], entry["course"]
+
+
+def diff_dumps(first_path, second_path):
+    """Yields (code, first course, second course) for every course that differs. A missing course is None.
+
+    Both dumps are sorted by code, so they are walked side by side and only one course of each is held at a time.
+    """
+
+    first, second = read_dump(first_path), read_dump(second_path)
+    first_entry, second_entry = next(first, None), next(second, None)
+
+    while first_entry is not None or second_entry is not None:
+        if second_entry is None or (first_entry is not None and first_entry[0] < second_entry[0]):
+            yield first_entry[0], first_entry[1], None
+            first_entry = next(first, None)
+        elif first_entry is None or second_entry[0] < first_entry[0]:
+            yield second_entry[0], None, second_entry[1]
+            second_entry = next(second, None)
+        else:
+            if first_entry[1] != second_entry[1]:
+                yield first_entry[0], first_entry[1], second_entry[1]
+
+            first_entry, second_entry = next(first, None), next(second, None)
+
+
+def print_diff(first_path, second_path):
+    """Prints the courses that differ between two dumps. Returns the number of them."""
+
+    num_differences = 0
+
+    for code, first_course, second_course in diff_dumps(first_path, second_path):
+        num_differences += 1
+
+        if first_course is None:
+            print("- " + code + ": only in " + second_path + ".")
+        elif second_course is None:
+            print("- " + code + ": only in " + first_path + ".")
+        else:
+            keys = sorted(key for key in set(first_course) | set(second_course) if first_course.get(key) != second_course.get(key))
+            print("- " + code + ": " + ", ".join(keys) + " differ.")
+
+    if num_differences:
+        print(color.BOLD + color.RED + "- Number of different courses: " + str(num_differences) + "." + color.END)
+    else:
+        print(color.BOLD + color.GREEN + "- Identical." + color.END)
+
+    return num_differences
+
+
+if __name__ == "__main__":
+    # Ex. python dump.py check.jsonl.gz check_multiprocessing.jsonl.gz
+    sys.exit(1 if print_diff(sys.argv[1], sys.argv[2]) else 0)
@@ -0,0 +1,107 @@
+"""Python file used to journal a scrape, so an interrupted run picks up where it stopped. Created by Aykan Fonseca."""
+
+# Builtins
+import glob
+import hashlib
+import json
+import os
+
+# Constants
+from constants import JOURNAL_DIR
+
+# A journal is a JSON Lines file that is only ever appended to, one record per line:
+#   {"type": "search", "search": {...}, "pages": 212}
+#   {"type": "page", "number": 1, "rows": [...], "emails": {...}, "department": "CSE", "digest": "3f2a..."}
+#   {"type": "upload", "path": "/quarter/WI19/", "batch": 3}
+# A run that dies mid-write leaves at most a partial last line, which is ignored.
+
+
+def journal_path(quarter, timestamp):
+    """Path to the journal of the scrape of quarter started at timestamp."""
+
+    return os.path.join(JOURNAL_DIR, quarter + "-" + str(timestamp) + ".jsonl")
+
+
+def page_digest(rows):
+    """A short digest of the rows extracted from a page, used to tell whether the page still has the same rows."""
+
+    return hashlib.sha1(json.dumps(rows, sort_keys=True).encode("utf_8")).hexdigest()
+
+
+def find_unfinished(quarter):
+    """Returns the timestamp of the latest scrape of quarter that did not finish, or None."""
+
+    paths = glob.glob(os.path.join(JOURNAL_DIR, quarter + "-*.jsonl"))
+
+    if not paths:
+        return None
+
+    return max(int(os.path.basename(path)[len(quarter) + 1:-len(".jsonl")]) for path in paths)
+
+
+def read_journal(quarter, timestamp):
+    """Returns what the journal of a scrape recorded.
+
+    Ex. {"search": {...}, "pages": 212, "done pages": [{"rows": [...], "emails": {...}, "department": "CSE"}, ...],
+         "uploads": {"/quarter/WI19/": set([0, 1, 3])}}
+    Only the pages finished in order are kept, so page n + 1 always continues from page n.
+    """
+
+    state = {"search": None, "pages": 0, "done pages": [], "uploads": {}}
+
+    try:
+        file = open(journal_path(quarter, timestamp))
+    except (IOError, OSError):
+        return state
+
+    with file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+
+            if record["type"] == "search":
+                state.update({"search": record["search"], "pages": record["pages"], "done pages": []})
+            elif record["type"] == "page" and record["number"] == len(state["done pages"]) + 1:
+                state["done pages"].append(record)
+            elif record["type"] == "upload":
+                state["uploads"].setdefault(record["path"], set()).add(record["batch"])
+
+    return state
+
+
+def open_journal(quarter, timestamp):
+    """Opens the journal of a scrape for appending. A partial last line left by a dead run is cut off first."""
+
+    if not os.path.isdir(JOURNAL_DIR):
+        os.makedirs(JOURNAL_DIR)
+
+    path = journal_path(quarter, timestamp)
+
+    if os.path.exists(path):
+        with open(path, "rb+") as file:
+            file.truncate(file.read().rfind(b"\n") + 1)
+
+    return open(path, "a")
+
+
+def append(journal, record):
+    """Appends a record and makes sure it is on disk before the scrape moves on."""
+
+    journal.write(json.dumps(record, sort_keys=True, separators=(",", ":")) + "\n")
+    journal.flush()
+    os.fsync(journal.fileno())
+
+
+def discard_journal(quarter, timestamp):
+    """Deletes the journal of a scrape."""
+
+    os.remove(journal_path(quarter, timestamp))
+
+
+def finish(journal, quarter, timestamp):
+    """Closes and deletes the journal of a scrape that finished. There is nothing left to resume."""
+
+    journal.close()
+    discard_journal(quarter, timestamp)
@@ -1,15 +1,94 @@
-"""Python program to scrape UC San Diego's Schedule of Classes. Created by Aykan Fonseca."""
+"""Python program to scrape UC San Diego's Schedule of Classes by submitting its search form. Created by Aykan Fonseca."""
+
+# Builtins
+from multiprocessing.pool import ThreadPool
+import re
+import sys
+
+try:
+    from urllib.parse import urljoin
+except ImportError:
+    from urlparse import urljoin
 
 # Pip install packages.
-from selenium import webdriver
-from selenium.webdriver.support.ui import Select
-# from selenium.webdriver.common.by import By
+from bs4 import BeautifulSoup
+
+# Local modules.
+import browsers
+import cache
+import transport
 
 # Constants
-from constants import SOC_URL, timer, timer_main
+from constants import color, timer, timer_main, SOC_URL, SOC_FORM_URL, HEADERS, MAX_WORKERS
+
+# Global Variables.
+SESSION = transport.Session()
+FORM = None # The search form, fetched once. See get_form.
+
+PAGES_REGEX = re.compile(r"of&nbsp;([0-9]*)")
+
+
+class FormNotFound(Exception):
+    """Raised when the search page has no search form, so it can't be submitted without a browser."""
+    pass
+
+
+def get_form():
+    """Fetches the search form once and returns it as a BeautifulSoup tag."""
+
+    global FORM
+
+    if FORM is None:
+        page = BeautifulSoup(cache.fetch(SESSION, SOC_FORM_URL, headers=HEADERS), "lxml")
+        subjects = page.find(id="selectedSubjects")
+        FORM = subjects.find_parent("form") if subjects is not None else None
+
+        if FORM is None:
+            raise FormNotFound(SOC_FORM_URL)
+
+    return FORM
+
+
+def form_fields(form):
+    """Returns the fields a browser would submit for form untouched. Ex. {"selectedTerm": ["WI19"], "schedOption1": ["true"]}"""
 
-driver = webdriver.PhantomJS()
-driver.get(SOC_URL)
+    fields = {}
+
+    for field in form.find_all(["input", "select", "textarea"]):
+        name = field.get("name")
+
+        if not name or field.has_attr("disabled"):
+            continue
+
+        if field.name == "select":
+            options = field.find_all("option")
+            selected = [option for option in options if option.has_attr("selected")]
+
+            # A single select without a selected option submits its first one.
+            if not selected and options and not field.has_attr("multiple"):
+                selected = options[:1]
+
+            values = [option.get("value", option.text) for option in selected]
+        elif field.name == "textarea":
+            values = [field.text]
+        elif field.get("type", "text").lower() in ("checkbox", "radio"):
+            values = [field.get("value", "on")] if field.has_attr("checked") else []
+        elif field.get("type", "text").lower() in ("submit", "button", "reset", "image", "file"):
+            values = []
+        else:
+            values = [field.get("value", "")]
+
+        fields.setdefault(name, []).extend(values)
+
+    return fields
+
+
+def get_options(select_id):
+    """Returns (text, value) of every option of the form's dropdown with select_id."""
+
+    options = get_form().find(id=select_id).find_all("option")
+
+    return [(option.text.strip(), option.get("value", option.text)) for option in options]
 
 
 @timer
@@ -19,10 +98,7 @@ def get_departments():
     Return Type: List
     """
 
-    departments = driver.find_element_by_id(
-        "selectedSubjects").find_elements_by_tag_name("option")
-
-    return [department.text for department in departments]
+    return [text for text, _ in get_options("selectedSubjects")]
 
 
 @timer
@@ -32,10 +108,7 @@ def get_department_codes():
     Return Type: List
     """
 
-    departments = driver.find_element_by_id(
-        "selectedSubjects").find_elements_by_tag_name("option")
-
-    return [department.text.partition(" ")[0] for department in departments]
+    return [text.partition(" ")[0] for text, _ in get_options("selectedSubjects")]
 
 
 @timer
@@ -45,41 +118,110 @@ def get_quarters():
     Return Type: List
     """
 
-    quarters = driver.find_element_by_id(
-        "selectedTerm").find_elements_by_tag_name("option")
+    return [value for _, value in get_options("selectedTerm")]
+
+
+def search(quarter=None, subjects=None):
+    """Submits the search form for quarter and subjects, all of them by default. Returns (the search, its number of pages).
+
+    The search is the posted fields. Its result pages are only served to SESSION, which holds the search's cookie.
+    """
+
+    form = get_form()
+    fields = form_fields(form)
 
-    return [quarter.get_attribute("value") for quarter in quarters]
+    fields["selectedTerm"] = [quarter or get_quarters()[0]]
+    fields["selectedSubjects"] = subjects or [value for _, value in get_options("selectedSubjects")]
 
+    post = cache.fetch(SESSION, urljoin(SOC_FORM_URL, form.get("action", "")), data=fields)
+    num_pages = PAGES_REGEX.search(post.decode("utf_8", "replace"))
 
-def spin():
-    button = driver.find_element_by_id("socFacSubmit")
-    button.click()
+    return fields, int(num_pages.group(1)) if num_pages else 0
 
-    time.sleep(2)
 
-    html = driver.page_source
+def get_results(fields, num_pages, workers=MAX_WORKERS):
+    """Downloads every result page of the search last submitted and returns their html in page order."""
 
+    def get_page(num):
+        return cache.fetch(SESSION, SOC_URL + str(num), headers=HEADERS, vary=fields)
 
-@timer_main
-def main():
-    # print get_departments()
-    # print get_quarters()
+    transport.size_pool(SESSION, workers)
+    pool = ThreadPool(workers)
+
+    try:
+        return pool.map(get_page, range(1, num_pages + 1))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def browser_results(quarter=None, subjects=None):
+    """Selects quarter and subjects in a browser and submits the form. Returns the html of the first result page.
+
+    Only needed when the form can't be submitted directly. The browser comes from browsers.py, which imports
+    selenium only when a browser is started, so selenium is optional.
+    """
+
+    from selenium.webdriver.support.ui import Select
+
+    with browsers.get_pool().driver() as driver:
+        driver.get(SOC_FORM_URL)
+
+        if quarter:
+            Select(driver.find_element_by_id("selectedTerm")).select_by_value(quarter)
+
+        dropdown = driver.find_element_by_id("selectedSubjects")
 
-    dropdown = driver.find_element_by_id("selectedSubjects")
+        for option in dropdown.find_elements_by_tag_name("option"):
+            if not subjects or option.get_attribute("value") in subjects:
+                Select(dropdown).select_by_visible_text(option.text)
 
-    for option in dropdown.find_elements_by_tag_name("option"):
-        Select(dropdown).select_by_visible_text(option.text)
+        driver.find_element_by_id("socFacSubmit").submit()
+
+        return driver.page_source
+
+
+@timer
+def get_data(quarter=None, subjects=None):
+    """Searches quarter and subjects, falling back to a browser without a search form. Returns the html of each result page."""
+
+    print(color.BOLD + color.DARKCYAN + "### Submitting search ###" + color.END)
+
+    try:
+        fields, num_pages = search(quarter, subjects)
+    except FormNotFound:
+        print(color.RED + "- No search form found, using a browser." + color.END)
+        return [browser_results(quarter, subjects)]
+
+    print("- Number of pages: " + str(num_pages) + ".")
+
+    pages = get_results(fields, num_pages)
+
+    transport.print_stats()
+
+    return pages
+
+
+@timer_main
+def main():
+    # print(get_departments())
+    # print(get_quarters())
 
-    driver.find_element_by_id("socFacSubmit").submit()
+    # Ex. python main.py WI19
+    try:
+        pages = get_data(*sys.argv[1:2])
+    finally:
+        browsers.close_pool()
 
-    tr_elements = driver.find_elements_by_tag_name('tr')
+    for page in pages:
+        soup = BeautifulSoup(page, "lxml")
 
-    for elem in tr_elements:
-        print elem.text
-        print '\n'
+        for row in soup.find_all("tr"):
+            print(row.get_text(" ", strip=True))
+            print("\n")
 
-    for thing in driver.find_elements_by_tag_name("a"):
-        print thing.get_attribute("href")
+        for link in soup.find_all("a", href=True):
+            print(link["href"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+"""Python file used to collect the timings, counts, and latencies of a run and export them. Created by Aykan Fonseca."""
+
+# Builtins
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None # Not available on Windows.
+
+# Global Variables.
+LOCK = threading.Lock()
+STAGES = [] # One entry per timed function call, in the order they finished.
+COUNTS = {} # Ex. {"pages": 200, "rows": 30000, "courses": 4000}
+HISTOGRAMS = {} # Ex. {"request_latency_seconds": {"buckets": [...], "count": 200, "sum": 80.5}}
+CACHES = {} # Memoized functions by name. See constants.memoize.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30) # Upper bounds in seconds.
+
+
+def cpu_time():
+    """CPU seconds used by this process (all threads)."""
+
+    return time.process_time() if hasattr(time, "process_time") else time.clock()
+
+
+def peak_rss():
+    """Peak resident memory of this process in bytes, or None where it can't be measured."""
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset():
+    """Forgets everything recorded, so each run reports only itself."""
+
+    with LOCK:
+        del STAGES[:]
+        COUNTS.clear()
+        HISTOGRAMS.clear()
+
+        for cache in CACHES.values():
+            cache.hits = 0
+            cache.misses = 0
+
+
+def measure(name, func, args, kw, profile_path=None):
+    """Calls func(*args, **kw) and records its wall time, CPU time, and the peak memory so far under name.
+
+    With a profile_path, the call also runs under cProfile and the stats are written there.
+    """
+
+    start_wall, start_cpu = time.time(), cpu_time()
+
+    if profile_path:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args, **kw)
+        profiler.dump_stats(profile_path)
+    else:
+        result = func(*args, **kw)
+
+    stage = {
+        "stage": name,
+        "wall seconds": time.time() - start_wall,
+        "cpu seconds": cpu_time() - start_cpu,
+        "peak rss bytes": peak_rss()
+    }
+
+    with LOCK:
+        STAGES.append(stage)
+
+    return result
+
+
+def count(name, amount=1):
+    """Adds amount to the count of name. Ex. count("pages")."""
+
+    with LOCK:
+        COUNTS[name] = COUNTS.get(name, 0) + amount
+
+
+def observe(name, value, buckets=LATENCY_BUCKETS):
+    """Adds value to the histogram of name. Ex. observe("request_latency_seconds", 0.4)."""
+
+    with LOCK:
+        if name not in HISTOGRAMS:
+            HISTOGRAMS[name] = {"bounds": list(buckets), "buckets": [0] * len(buckets), "count": 0, "sum": 0.0}
+
+        histogram = HISTOGRAMS[name]
+        histogram["count"] += 1
+        histogram["sum"] += value
+
+        for index, bound in enumerate(histogram["bounds"]):
+            if value <= bound:
+                histogram["buckets"][index] += 1
+                break
+
+
+def cache_info():
+    """Returns {function name: {"hits": ..., "misses": ...}} for every memoized function."""
+
+    return dict((name, {"hits": cache.hits, "misses": cache.misses}) for name, cache in CACHES.items())
+
+
+def report():
+    """Everything recorded so far as a dictionary."""
+
+    with LOCK:
+        return {"stages": list(STAGES), "counts": dict(COUNTS), "histograms": json.loads(json.dumps(HISTOGRAMS)),
+                "caches": cache_info()}
+
+
+def prometheus_text():
+    """Everything recorded so far in Prometheus' text exposition format."""
+
+    data = report()
+    lines = []
+
+    for metric, key in (("parser_stage_wall_seconds", "wall seconds"), ("parser_stage_cpu_seconds", "cpu seconds"),
+                        ("parser_stage_peak_rss_bytes", "peak rss bytes")):
+        lines.append("# TYPE " + metric + " gauge")
+        for stage in data["stages"]:
+            if stage[key] is not None:
+                lines.append(metric + '{stage="' + stage["stage"] + '"} ' + str(stage[key]))
+
+    lines.append("# TYPE parser_items_total counter")
+    for name, amount in sorted(data["counts"].items()):
+        lines.append('parser_items_total{item="' + name + '"} ' + str(amount))
+
+    for metric in ("hits", "misses"):
+        lines.append("# TYPE parser_cache_" + metric + "_total counter")
+        for name, info in sorted(data["caches"].items()):
+            lines.append("parser_cache_" + metric + '_total{function="' + name + '"} ' + str(info[metric]))
+
+    for name, histogram in sorted(data["histograms"].items()):
+        metric = "parser_" + name
+        cumulative = 0
+
+        lines.append("# TYPE " + metric + " histogram")
+        for bound, amount in zip(histogram["bounds"], histogram["buckets"]):
+            cumulative += amount
+            lines.append(metric + '_bucket{le="' + str(bound) + '"} ' + str(cumulative))
+        lines.append(metric + '_bucket{le="+Inf"} ' + str(histogram["count"]))
+        lines.append(metric + "_sum " + str(histogram["sum"]))
+        lines.append(metric + "_count " + str(histogram["count"]))
+
+    return "\n".join(lines) + "\n"
+
+
+def write_report(path):
+    """Writes everything recorded to path, as Prometheus text if it ends in .prom and as JSON otherwise."""
+
+    directory = os.path.dirname(path)
+
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    with open(path, "w") as file:
+        if path.endswith(".prom"):
+            file.write(prometheus_text())
+        else:
+            json.dump(report(), file, indent=2, sort_keys=True)
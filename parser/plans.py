@@ -1,27 +1,28 @@
 """Python program to scrape UC San Diego's Plan website for 4-year major plans. Created by Aykan Fonseca."""
 
 # Builtins
+from multiprocessing.pool import ThreadPool
+import json
 import time
 
 # Pip install packages.
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support import expected_conditions as EC
 
+# Local modules.
+import browsers
+from dump import open_dump
+
 # Constants
-from constants import color, timer, timer_main, PLANS_URL
+from constants import color, timer, timer_main, PLANS_URL, PLANS_PATH, BROWSER_POOL_SIZE
 
 COLLEGES = set(["Revelle", "John Muir", "Thurgood Marshall",
                 "Earl Warren", "Eleanor Roosevelt", "Sixth"])
 
 
-driver = webdriver.PhantomJS()
-driver.get(PLANS_URL)
-
-
 def get_options(web_element):
     """Utility: Returns the options from a dropdown."""
 
@@ -43,9 +44,11 @@ def verify_selected_option(web_element):
     return Select(web_element).first_selected_option.text
 
 
-def get_colleges():
+def get_colleges(driver):
     """Returns a list of all colleges from modal."""
 
+    driver.get(PLANS_URL)
+
     modal = driver.find_element_by_id("college-select-modal")
 
     dropdown = modal.find_element_by_tag_name("select")
@@ -53,8 +56,10 @@ def get_colleges():
     return get_options(dropdown)
 
 
-def select_college(selected_college):
-    """Selects a college from modal."""
+def select_college(driver, selected_college):
+    """Opens the plans website and selects a college from modal."""
+
+    driver.get(PLANS_URL)
 
     modal = driver.find_element_by_id("college-select-modal")
 
@@ -68,53 +73,112 @@ def select_college(selected_college):
 
     selected_college = verify_selected_option(college_dropdown)
 
-    if selected_college in COLLEGES:
-        print("Selected College: " + selected_college + "\n")
-    else:
+    if selected_college not in COLLEGES:
         print(color.RED + "ERROR: Unknown College Selected." + "\n" + color.END)
 
 
-@timer_main
-def main():
-    colleges = get_colleges()
-
-    select_college(colleges[0])
+def get_dropdown(driver, index):
+    """Returns a dropdown of the plan form. 1 is the year, 2 the department, and 3 the major."""
 
     former = driver.find_element_by_tag_name("form")
 
-    year_dropdown = former.find_elements_by_xpath(
-        "//div[@class='form-group']")[1].find_element_by_tag_name("select")
+    return former.find_elements_by_xpath(
+        "//div[@class='form-group']")[index].find_element_by_tag_name("select")
 
-    years = get_options(year_dropdown)
-    select_option(year_dropdown, years[0])
-    print verify_selected_option(year_dropdown)
 
-    department_dropdown = former.find_elements_by_xpath(
-        "//div[@class='form-group']")[2].find_element_by_tag_name("select")
+def get_majors(driver, college, year, department):
+    """Returns the majors of a department for a college and year."""
 
-    departments = get_options(department_dropdown)
-    select_option(department_dropdown, departments[0])
-    print verify_selected_option(department_dropdown)
+    select_college(driver, college)
+    select_option(get_dropdown(driver, 1), year)
+    select_option(get_dropdown(driver, 2), department)
 
-    major_dropdown = former.find_elements_by_xpath(
-        "//div[@class='form-group']")[3].find_element_by_tag_name("select")
+    return get_options(get_dropdown(driver, 3))
 
-    majors = get_options(major_dropdown)
-    select_option(major_dropdown, majors[0])
-    print verify_selected_option(major_dropdown)
+
+def get_plan(driver, college, year, department, major):
+    """Returns the html of a major's 4-year plan for a college and year."""
+
+    select_college(driver, college)
+    select_option(get_dropdown(driver, 1), year)
+    select_option(get_dropdown(driver, 2), department)
+    select_option(get_dropdown(driver, 3), major)
 
     # WebDriverWait(driver, 3)
 
     time.sleep(5)
 
-    print driver.page_source
+    return driver.page_source
 
     # try:
     #     myElem = WebDriverWait(driver, delay).until(
     #         EC.presence_of_element_located((By.ID, "IdOfMyElement")))
-    #     print "Page is ready!"
+    #     print("Page is ready!")
     # except TimeoutException:
-    #     print "Loading took too much time!"
+    #     print("Loading took too much time!")
+
+
+def crawl_department(pool, college, year, department):
+    """Returns {(college, year, department, major): plan html} for every major of a department, using one browser of pool."""
+
+    with pool.driver() as driver:
+        return dict(((college, year, department, major), get_plan(driver, college, year, department, major))
+                    for major in get_majors(driver, college, year, department))
+
+
+@timer
+def crawl(pool):
+    """Crawls every college, year, department, and major, one department per browser of pool at once."""
+
+    print(color.BOLD + color.DARKCYAN + "### Crawling plans ###" + color.END)
+
+    with pool.driver() as driver:
+        colleges = get_colleges(driver)
+        select_college(driver, colleges[0])
+        years = get_options(get_dropdown(driver, 1))
+        departments = get_options(get_dropdown(driver, 2))
+
+    jobs = [(college, year, department) for college in colleges for year in years for department in departments]
+    workers = ThreadPool(pool.size)
+    plans = {}
+
+    try:
+        for department_plans in workers.imap_unordered(lambda job: crawl_department(pool, *job), jobs):
+            plans.update(department_plans)
+    finally:
+        workers.close()
+        workers.join()
+
+    print("- Number of plans: " + str(len(plans)) + ".")
+
+    return plans
+
+
+def write_plans(plans, path=PLANS_PATH):
+    """Writes the plans of crawl as one line per plan, sorted. Ex. {"college": "Revelle", "year": "2018", ..., "plan": "<html>..."}"""
+
+    with open_dump(path, "wb") as file:
+        for college, year, department, major in sorted(plans):
+            line = json.dumps({"college": college, "year": year, "department": department, "major": major,
+                               "plan": plans[(college, year, department, major)]}, sort_keys=True, separators=(",", ":"))
+            file.write(line.encode("utf_8") + b"\n")
+
+    print("- Wrote the plans to " + path + ".")
+
+
+@timer_main
+def main():
+    pool = browsers.get_pool()
+
+    try:
+        print("- Starting " + str(BROWSER_POOL_SIZE) + " browsers.")
+        pool.start()
+
+        plans = crawl(pool)
+    finally:
+        browsers.close_pool()
+
+    write_plans(plans)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+"""Python file used to hold the compact records courses are parsed into. Created by Aykan Fonseca."""
+
+# Builtins
+import collections
+
+# The keys each record is exported under, in the order they are written to the database.
+SECTION_KEYS = ("id", "meeting type", "number", "days", "start time", "end time", "building", "room", "name", "seats taken", "seats available")
+EXAM_KEYS = ("meeting type", "number", "days", "start time", "end time", "building", "room")
+HEADER_KEYS = ("code", "units", "restrictions", "description", "prerequisites", "title")
+
+# Tuples are a fraction of the size of the dictionaries they are exported as. Ex. section.seats_taken
+Section = collections.namedtuple("Section", [key.replace(" ", "_") for key in SECTION_KEYS])
+Exam = collections.namedtuple("Exam", [key.replace(" ", "_") for key in EXAM_KEYS])
+Header = collections.namedtuple("Header", HEADER_KEYS)
+
+
+class Course(object):
+    """One course block of the schedule: its header, sections, and exams. Courses with a code share a header."""
+
+    __slots__ = ("header", "sections", "midterm", "final")
+
+    def __init__(self, header, sections, midterm=None, final=None):
+        self.header = header
+        self.sections = sections
+        self.midterm = midterm
+        self.final = final
+
+    @property
+    def seats(self):
+        """The course's seats are those of its last section."""
+
+        if not self.sections:
+            return ("-", "-")
+
+        return (self.sections[-1].seats_taken, self.sections[-1].seats_available)
+
+
+class CourseGroup(object):
+    """Every course block with one code. seats and waitlisted are filled in by soc.compute_meta_data."""
+
+    __slots__ = ("header", "dei", "courses", "seats", "waitlisted")
+
+    def __init__(self, header, dei, courses):
+        self.header = header
+        self.dei = dei
+        self.courses = courses
+        self.seats = ("-", "-")
+        self.waitlisted = False
+
+
+def section_to_dict(section):
+    """Ex. {"id": "945848", "meeting type": "LE", ...}"""
+    return dict(zip(SECTION_KEYS, section))
+
+
+def exam_to_dict(exam):
+    """Exams are exported with the keys of a section. A missing exam is an empty dictionary."""
+
+    if exam is None:
+        return {}
+
+    return {
+        "id": "-", "meeting type": exam.meeting_type, "number": exam.number, "days": exam.days,
+        "start time": exam.start_time, "end time": exam.end_time, "building": exam.building, "room": exam.room,
+        "name": "-", "seats taken": "-", "seats available": "-"
+    }
+
+
+def course_to_dict(course):
+    """Exports a parsed course. Ex. {"sections": [...], "midterm": {...}, "final": {...}, "seats": (40, 50), "code": "CSE 100", ...}"""
+
+    exported_course = {
+        "sections": [section_to_dict(section) for section in course.sections],
+        "midterm": exam_to_dict(course.midterm), "final": exam_to_dict(course.final),
+        "seats": course.seats
+    }
+
+    exported_course.update(zip(HEADER_KEYS, course.header))
+
+    return exported_course
+
+
+def group_to_dict(group):
+    """Exports a course group in the shape written to the database."""
+
+    return {
+        "title": group.header.title,
+        "description": group.header.description,
+        "prerequisites": group.header.prerequisites,
+        "restrictions": group.header.restrictions,
+        "units": group.header.units,
+        "dei": "true" if group.dei else "false",
+        "seats": group.seats,
+        "sections": [
+            {
+                "section": [section_to_dict(section) for section in course.sections],
+                "midterm": exam_to_dict(course.midterm),
+                "final": exam_to_dict(course.final)
+            }
+            for course in group.courses
+        ],
+        "waitlisted": "true" if group.waitlisted else "false"
+    }
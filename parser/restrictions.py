@@ -0,0 +1,244 @@
+"""Python file used to turn restriction codes into readable phrases through a precomputed table. Created by Aykan Fonseca."""
+
+# Builtins
+import itertools
+import json
+import os
+
+# Local modules.
+import metrics
+
+# Constants
+from constants import CONVERT_RESTRICTIONS, CONVERT_RESTRICTIONS_MINIMAL, RESTRICTIONS_TABLE, RESTRICTIONS_LEARNED
+
+# Global Variables.
+TABLE = None # Maps a restriction string to its phrase. Loaded from RESTRICTIONS_TABLE on first use.
+LEARNED = {} # Phrases of combinations the built table lacks, kept in RESTRICTIONS_LEARNED rather than the committed table.
+TABLE_CHANGED = False # Whether a phrase was added to LEARNED since it was loaded.
+TABLE_SIZE = 3 # build_table covers every ordering of up to this many codes.
+
+ONLY_RESTRICTIONS = set(["ER", "FR", "GR", "JR", "LD", "MU", "O", "RE", "SI", "SO", "SR", "TH", "UD", "WA"])
+NOT_RESTRICTIONS = set(["N", "XFR", "XGR", "XJR", "XLD", "XSO", "XSR", "XUD"])
+SPECIAL_RESTRICTIONS = set(["D", "ER", "MU", "O", "RE", "SI", "TH", "WA", "N"])
+APPEND_ONLY_RESTRICTIONS = set(["ER", "MU", "RE", "SI", "TH", "WA", "O"])
+
+# Used Custom Sorts. The higher the number, the higher the priority / earlier they appear.
+RESTRICTION_RANKS = {"FR": 5, "XFR": 5, "SO": 4, "XSO": 4, "JR": 3, "XJR": 3, "SR": 2, "XSR": 2, "GR": 1, "XGR": 1}
+SPECIAL_RANKS = {"D": 2, "O": 2, "N": 1, "ER": 1, "MU": 1, "RE": 1, "SI": 1, "TH": 1, "WA": 1}
+
+
+class StrangeRestrictions(Exception):
+    """Raised for a combination of restriction codes that has no sensible phrase."""
+
+    def __init__(self, message, codes):
+        Exception.__init__(self, message)
+        self.codes = codes
+
+
+def rank_key(restriction_code):
+    """Orders restrictions by RESTRICTION_RANKS priority."""
+    return -RESTRICTION_RANKS.get(restriction_code, 0)
+
+
+def special_key(restriction_code):
+    """Orders restrictions by SPECIAL_RANKS priority."""
+    return -SPECIAL_RANKS.get(restriction_code, 0)
+
+
+def phrase_restrictions(restrictions):
+    """Converts and formats restrictions text. Ex. JR SR => Open to Juniors and Seniors only.
+
+    Raises StrangeRestrictions if the codes do not combine into a phrase.
+    """
+
+    restriction_codes = restrictions.strip().split(" ")
+    num_restrictions = len(restriction_codes)
+    set_restrictions = set(restriction_codes)
+
+    if num_restrictions == 1:
+        return CONVERT_RESTRICTIONS[restriction_codes[0]] + "."
+
+    # If we have two, we need to determine if the language is "and" or "or" and whether to include only.
+    elif num_restrictions == 2:
+        if set_restrictions.issubset(ONLY_RESTRICTIONS):
+            return "Open to " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[0]] + " and " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[1]] + " Only."
+        elif set_restrictions.issubset(NOT_RESTRICTIONS):
+            return "Not open to " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[0]] + " or " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[1]] + "."
+        elif "D" in restriction_codes:
+            converted_restrictions = sorted([CONVERT_RESTRICTIONS[code] for code in restriction_codes])
+            return converted_restrictions[0] + " and " + converted_restrictions[1] + "."
+        else:
+            raise StrangeRestrictions("EXCEPTION: MIXTURE of OPEN AND NOT OPEN.", restriction_codes)
+
+    # Three and more, we need commas and determine if "and" or "or" and whether to include only.
+    formatted_restrictions = ""
+
+    # Check to see if we have any special restrictions in our restriction codes. We want those to be displayed first.
+    if not set_restrictions.isdisjoint(SPECIAL_RESTRICTIONS):
+        restriction_codes.sort(key=rank_key)
+        restriction_codes.sort(key=special_key)
+
+        if restriction_codes[0] not in SPECIAL_RESTRICTIONS:
+            raise StrangeRestrictions("EXCEPTION: #3 STRANGE CASE", restriction_codes)
+        if num_restrictions != 3:
+            raise StrangeRestrictions("EXCEPTION: #2 STRANGE CASE", restriction_codes)
+
+        formatted_restrictions += CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[0]] + (" Only" if restriction_codes[0] in APPEND_ONLY_RESTRICTIONS else "") + ", and "
+        set_restrictions = set(restriction_codes[1:])
+
+        if set_restrictions.issubset(ONLY_RESTRICTIONS):
+            formatted_restrictions += "Open to " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[1]] + " and " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[2]] + " Only."
+        elif set_restrictions.issubset(NOT_RESTRICTIONS):
+            formatted_restrictions += "Not open to " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[1]] + " or " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[2]] + "."
+        else:
+            raise StrangeRestrictions("EXCEPTION: #1 STRANGE CASE", restriction_codes)
+
+    # Iterate through all except the last, where we apply special formatting to make it semantically-correct.
+    elif set_restrictions.issubset(ONLY_RESTRICTIONS):
+        restriction_codes.sort(key=rank_key)
+
+        formatted_restrictions += "Open to "
+
+        for code in restriction_codes[:-1]:
+            formatted_restrictions += CONVERT_RESTRICTIONS_MINIMAL[code] + ", "
+
+        formatted_restrictions += "and " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[-1]] + " Only."
+
+    # Iterate through all except the last, where we apply special formatting to make it semantically-correct.
+    elif set_restrictions.issubset(NOT_RESTRICTIONS):
+        restriction_codes.sort(key=rank_key)
+
+        formatted_restrictions += "Not open to "
+
+        for code in restriction_codes[:-1]:
+            formatted_restrictions += CONVERT_RESTRICTIONS_MINIMAL[code] + ", "
+
+        formatted_restrictions += "or " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[-1]] + "."
+
+    else:
+        raise StrangeRestrictions("EXCEPTION: MIXTURE of OPEN AND NOT OPEN", restriction_codes)
+
+    return formatted_restrictions
+
+
+def build_table(size=TABLE_SIZE):
+    """Phrases every ordering of up to size distinct codes. The schedule does not print codes in any one order
+    (Ex. "SO JR" or "XFR XSO"), and the phrase can depend on it, so each order is a key of its own."""
+
+    table = {}
+
+    for length in range(1, size + 1):
+        for codes in itertools.permutations(sorted(CONVERT_RESTRICTIONS), length):
+            restrictions = " ".join(codes)
+
+            try:
+                table[restrictions] = phrase_restrictions(restrictions)
+            except StrangeRestrictions:
+                pass
+
+    return table
+
+
+def load_table(path=RESTRICTIONS_TABLE, learned_path=RESTRICTIONS_LEARNED):
+    """Reads the phrase table, or builds it if there is no table on disk, and adds the phrases learned while parsing."""
+
+    global TABLE, LEARNED, TABLE_CHANGED
+
+    if os.path.exists(path):
+        with open(path) as file:
+            TABLE = json.load(file)
+    else:
+        TABLE = build_table()
+
+    LEARNED = {}
+
+    if os.path.exists(learned_path):
+        with open(learned_path) as file:
+            LEARNED = json.load(file)
+
+    TABLE.update(LEARNED)
+    TABLE_CHANGED = False
+
+    return TABLE
+
+
+def save_table(path=RESTRICTIONS_LEARNED):
+    """Writes the learned phrases if any were added since the table was loaded. The committed table is left alone."""
+
+    global TABLE_CHANGED
+
+    if TABLE is None or not TABLE_CHANGED:
+        return
+
+    directory = os.path.dirname(path)
+
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    with open(path, "w") as file:
+        json.dump(LEARNED, file, indent=0, sort_keys=True)
+
+    TABLE_CHANGED = False
+
+
+def learned_phrases():
+    """Returns the phrases learned so far. Ex. by a worker process of soc.parse_data, for add_learned in the parent."""
+
+    return dict(LEARNED)
+
+
+def add_learned(learned):
+    """Adds phrases learned by another process, so save_table keeps them too."""
+
+    global TABLE_CHANGED
+
+    if TABLE is None:
+        load_table()
+
+    for restrictions, formatted_restrictions in learned.items():
+        if TABLE.get(restrictions) != formatted_restrictions:
+            TABLE[restrictions] = LEARNED[restrictions] = formatted_restrictions
+            TABLE_CHANGED = True
+
+
+def format_restrictions(restrictions):
+    """Returns the phrase for a restrictions string. Ex. JR SR => Open to Juniors and Seniors Only."""
+
+    global TABLE_CHANGED
+
+    if TABLE is None:
+        load_table()
+
+    try:
+        formatted_restrictions = TABLE[restrictions]
+    except KeyError:
+        format_restrictions.misses += 1
+    else:
+        format_restrictions.hits += 1
+        return formatted_restrictions
+
+    # A combination the table has not seen yet. Strange ones are kept as they are and not remembered.
+    try:
+        formatted_restrictions = phrase_restrictions(restrictions)
+    except StrangeRestrictions as error:
+        print(str(error))
+        print(error.codes)
+        return restrictions
+
+    TABLE[restrictions] = LEARNED[restrictions] = formatted_restrictions
+    TABLE_CHANGED = True
+
+    return formatted_restrictions
+
+format_restrictions.hits = 0
+format_restrictions.misses = 0
+metrics.CACHES["format_restrictions"] = format_restrictions
+
+
+if __name__ == "__main__":
+    TABLE = build_table()
+
+    with open(RESTRICTIONS_TABLE, "w") as file:
+        json.dump(TABLE, file, indent=0, sort_keys=True)
+
+    print("- Wrote " + str(len(TABLE)) + " restriction phrases to " + RESTRICTIONS_TABLE + ".")
@@ -0,0 +1,161 @@
+"""Python file used to parse section and exam rows of the Schedule of Classes. Created by Aykan Fonseca."""
+
+# Builtins
+import re
+
+# Local modules.
+from records import Section, Exam
+
+# Constants
+from constants import memoize
+
+# Compiled once, rather than once per course or row.
+NUMBER_REGEX = re.compile(r"\d+")
+DAYS_REGEX = re.compile(r"[A-Z][^A-Z]*")
+
+# Used Custom Sorts. The higher the number, the higher the priority / earlier they appear.
+DAY_RANKS = {"M": 7, "Tu": 6, "W": 5, "Th": 4, "F": 3, "S": 2, "Su": 1}
+
+
+@memoize
+def sort_days(days):
+    """Orders days from Monday to Sunday. Ex. WM => MW."""
+
+    return "".join(sorted(DAYS_REGEX.findall(days), key=lambda day: -DAY_RANKS.get(day, 0)))
+
+
+@memoize
+def convert_to_military(time):
+    """Expected format: 2:00a or 4:50p. Converts to military time."""
+
+    is_pm = True if time[-1] == "p" else False
+    temp = time[:-1].split(":")
+
+    if is_pm:
+        temp[0] = str(int(temp[0]) + 12)
+
+    return ":".join(temp)
+
+
+def parse_section(item):
+    """Parses a section row (one starting with "....") into a Section.
+
+    The row is split into tokens once and walked left to right: id, meeting type, number, days, times,
+    building, room. Whatever is left is the name followed by the seats.
+    Ex. "....945848 LE A00 MWF 10:00a-10:50a CENTR 115 Gillespie, Gary 120 150"
+    """
+
+    section_id, days, start_time, end_time, building, room = "-", "-", "TBA", "TBA", "-", "-"
+    name, seats_taken, seats_available = "-", "-", "-"
+
+    tokens = item.split(" ")
+
+    # IDs are the 6 digi unique identification code. Ex: 945848
+    if NUMBER_REGEX.search(item).start() == 4:
+        section_id = item[4:10].strip()
+        position = 1
+    else:
+        tokens[0] = tokens[0][4:]
+        position = 0
+
+    # Meeting type (ex. LE) and section number (ex. A00).
+    meeting_type = tokens[position]
+    number = tokens[position + 1]
+    position += 2
+
+    if tokens[position] != "TBA":
+        days = sort_days(tokens[position])
+        position += 1
+
+    # Time. Format is military time, so: 23:50 means 11:50pm.
+    if tokens[position] != "TBA":
+        start, _, end = tokens[position].partition("-")
+        start_time = convert_to_military(start)
+        end_time = convert_to_military(end)
+        position += 1
+
+    # Skip a token because time was given, but not building or room.
+    if len(tokens) > position + 1 and tokens[position] == tokens[position + 1] == "TBA":
+        position += 1
+
+    if tokens[position] != "TBA":
+        building = tokens[position]
+        room = tokens[position + 1]
+        position += 2
+
+    # The name and seats, rejoined once.
+    rest = " ".join(tokens[position:])
+    full_location = rest.find("FULL")
+
+    # Waitlist Full, the seats taken is the amount over plus the seats available. Ex. "Staff FULL Waitlist(12) 40"
+    if full_location != -1:
+        if full_location != 0:
+            name = "Staff" if "Staff" in rest else rest[:full_location - 1]
+
+        seat_info = rest[full_location:]
+        left_parens_location = seat_info.find("(")
+        right_parens_location = seat_info.find(")")
+
+        seats_available = int(seat_info[right_parens_location + 2:])
+        seats_taken = int(seat_info[left_parens_location + 1:right_parens_location]) + seats_available
+
+    # Unlimited seats.
+    elif "Unlim" in rest:
+        # Check if "TBA" is first value. If so, ignore.
+        if "TBA" == rest[0:3]:
+            rest = rest[4:]
+
+        name = "Staff" if "Staff " in rest else rest[:rest.find("Unlim") - 1]
+        seats_taken = "Unlimited"
+        seats_available = "Unlimited"
+
+    else:
+        number_match = NUMBER_REGEX.search(rest)
+        number_location = number_match.start() if number_match else 0
+
+        # Has name and seats. Usual Case.
+        if number_location != 0:
+            name = rest[:number_location].strip()
+            seats = rest[number_location:].strip().split(" ")
+            seats_taken = int(seats[0])
+            seats_available = int(seats[1])
+
+        # Name is present. Ex. Gillespie, Gary has a comma. But Staff won't. So we look for either.
+        elif "," in rest or rest.strip() == "Staff":
+            name = rest.strip()
+
+        # Seat info but no name. Think discussion sections without teacher name.
+        # Also, rarely, there's a case where there's no number and everything is just "TBA".
+        elif rest and rest != "TBA":
+            try:
+                seats = rest.split(" ")
+                seats_taken = int(seats[0])
+                seats_available = int(seats[1])
+            except IndexError:
+                print("ERROR")
+
+    return Section(section_id, meeting_type, number, days, start_time, end_time, building, room, name, seats_taken, seats_available)
+
+
+def parse_exam(item):
+    """Parses a final or midterm row (one starting with "****") into an Exam.
+
+    Ex. "****FI 12/10/2018 M 11:30a-2:29p CENTR 115"
+    """
+
+    tokens = item.split(" ")
+    start_time, end_time, building, room = "TBA", "TBA", "-", "-"
+
+    # Building & Room.
+    if len(tokens) == 6:
+        building = tokens[4]
+        room = tokens[5]
+
+    # The start and end times.
+    if tokens[3] != "TBA":
+        start, _, end = tokens[3].partition("-")
+        start_time = convert_to_military(start)
+        end_time = convert_to_military(end)
+
+    # Section number (ex. A00) and Days (which should only be one day).
+    return Exam("FI" if "FI" in item else "MI", tokens[1], tokens[2], start_time, end_time, building, room)
@@ -0,0 +1,442 @@
+"""Python file used to keep the seat history of courses and sections across scrapes. Created by Aykan Fonseca."""
+
+# Builtins
+from array import array
+import bisect
+import calendar
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+# Constants
+from constants import color, timer, SEATS_DIR
+
+# Seats are stored as integers, so the two non-numeric values get negative codes.
+UNLIMITED = -1
+NO_SEATS = -2 # The "-" placeholder.
+
+
+def encode_seats(seats):
+    """Ex. "Unlimited" => -1, "-" => -2, 40 => 40."""
+
+    if seats == "Unlimited":
+        return UNLIMITED
+    elif seats == "-":
+        return NO_SEATS
+
+    return seats
+
+
+def decode_seats(seats):
+    """Reverses encode_seats."""
+
+    if seats == UNLIMITED:
+        return "Unlimited"
+    elif seats == NO_SEATS:
+        return "-"
+
+    return seats
+
+
+def to_minutes(timestamp):
+    """Converts a TIMESTAMP (year-month-day-hour-minute) to minutes since the epoch. Scrapes are then evenly spaced."""
+
+    return calendar.timegm(time.strptime(str(timestamp), "%Y%m%d%H%M")) // 60
+
+
+def to_timestamp(minutes):
+    """Reverses to_minutes."""
+
+    return int(time.strftime("%Y%m%d%H%M", time.gmtime(minutes * 60)))
+
+
+def delta_encode(values):
+    """Ex. [100, 115, 130, 130] => [100, 15, 15, 0]. Small, repetitive numbers compress well."""
+
+    return [value - previous for previous, value in zip([0] + list(values[:-1]), values)]
+
+
+def delta_decode(deltas):
+    """Reverses delta_encode."""
+
+    values, total = array("l"), 0
+
+    for delta in deltas:
+        total += delta
+        values.append(total)
+
+    return values
+
+
+# A quarter's history lives in SEATS_DIR/<quarter>/:
+#   keys.txt                     Every course code and section id seen, one per line. A key's number is its line.
+#   segments/<TIMESTAMP>.bin     One per scrape: key numbers, seats taken, and seats available as int32 arrays.
+#   history.bin                  What compact merged: each key's series, delta-encoded and compressed on its own,
+#                                then a JSON index of where each series is, then the 8 byte offset of that index.
+# A scrape only appends a segment, so it costs as much as its own samples however long the history is.
+# compact folds the segments into history.bin offline. A query decodes only the series of its key.
+SAMPLE_TYPE = "i" # Segments hold 32 bit integers in this machine's byte order.
+INDEX_OFFSET = struct.Struct("<Q")
+
+
+def history_directory(quarter):
+    """Where the seat history of quarter is kept."""
+
+    return os.path.join(SEATS_DIR, quarter)
+
+
+def keys_path(quarter):
+    return os.path.join(history_directory(quarter), "keys.txt")
+
+
+def segments_directory(quarter):
+    return os.path.join(history_directory(quarter), "segments")
+
+
+def segment_path(quarter, timestamp):
+    return os.path.join(segments_directory(quarter), str(timestamp) + ".bin")
+
+
+def store_path(quarter):
+    return os.path.join(history_directory(quarter), "history.bin")
+
+
+def load_keys(quarter):
+    """Returns every key of quarter, in the order they were numbered."""
+
+    try:
+        with open(keys_path(quarter), "rb") as file:
+            return file.read().decode("utf_8").splitlines()
+    except (IOError, OSError):
+        return []
+
+
+def number_keys(quarter, keys):
+    """Returns {key: number} for every key of quarter, numbering and saving the keys in keys never seen before."""
+
+    numbers = dict((key, number) for number, key in enumerate(load_keys(quarter)))
+    new_keys = []
+
+    for key in keys:
+        if key not in numbers:
+            numbers[key] = len(numbers)
+            new_keys.append(key)
+
+    if new_keys:
+        if not os.path.isdir(history_directory(quarter)):
+            os.makedirs(history_directory(quarter))
+
+        with open(keys_path(quarter), "ab") as file:
+            file.write(("\n".join(new_keys) + "\n").encode("utf_8"))
+
+    return numbers
+
+
+def segment_timestamps(quarter):
+    """The TIMESTAMP of every segment of quarter, oldest first."""
+
+    try:
+        names = os.listdir(segments_directory(quarter))
+    except OSError:
+        return []
+
+    return sorted(int(name[:-len(".bin")]) for name in names if name.endswith(".bin"))
+
+
+def write_segment(samples, quarter, timestamp):
+    """Saves [(key, seats taken, seats available)] as the segment of a scrape. Recording a scrape again replaces it."""
+
+    numbers = number_keys(quarter, [key for key, _, _ in samples])
+    columns = (array(SAMPLE_TYPE), array(SAMPLE_TYPE), array(SAMPLE_TYPE))
+
+    for key, seats_taken, seats_available in samples:
+        columns[0].append(numbers[key])
+        columns[1].append(encode_seats(seats_taken))
+        columns[2].append(encode_seats(seats_available))
+
+    if not os.path.isdir(segments_directory(quarter)):
+        os.makedirs(segments_directory(quarter))
+
+    temp_path = segment_path(quarter, timestamp) + ".tmp"
+
+    with open(temp_path, "wb") as file:
+        for column in columns:
+            column.tofile(file)
+
+    os.rename(temp_path, segment_path(quarter, timestamp))
+
+
+def read_segment(quarter, timestamp):
+    """Returns the (key numbers, seats taken, seats available) arrays of a segment."""
+
+    values = array(SAMPLE_TYPE)
+
+    with open(segment_path(quarter, timestamp), "rb") as file:
+        values.fromfile(file, os.fstat(file.fileno()).st_size // values.itemsize)
+
+    size = len(values) // 3
+
+    return values[:size], values[size:2 * size], values[2 * size:]
+
+
+def latest_seats(quarter):
+    """Returns {key: (seats taken, seats available)} from the latest segment of quarter."""
+
+    timestamps = segment_timestamps(quarter)
+
+    if not timestamps:
+        return {}
+
+    keys = load_keys(quarter)
+    numbers, all_taken, all_available = read_segment(quarter, timestamps[-1])
+
+    return dict((keys[number], (decode_seats(taken), decode_seats(available)))
+                for number, taken, available in zip(numbers, all_taken, all_available))
+
+
+def encode_series(columns):
+    """Delta-encodes and compresses one key's (minutes, seats taken, seats available)."""
+
+    return zlib.compress(json.dumps([delta_encode(column) for column in columns], separators=(",", ":")).encode("utf_8"))
+
+
+def decode_series(blob):
+    """Reverses encode_series."""
+
+    return tuple(delta_decode(column) for column in json.loads(zlib.decompress(blob).decode("utf_8")))
+
+
+def read_index(file):
+    """Returns {key: [offset, length]} of the series in an open history.bin."""
+
+    file.seek(-INDEX_OFFSET.size, os.SEEK_END)
+    index_offset = INDEX_OFFSET.unpack(file.read(INDEX_OFFSET.size))[0]
+
+    file.seek(index_offset)
+
+    return json.loads(file.read()[:-INDEX_OFFSET.size].decode("utf_8"))
+
+
+def read_series(quarter, key):
+    """Returns key's compacted (minutes, seats taken, seats available) arrays, or None. No other series is decoded."""
+
+    try:
+        file = open(store_path(quarter), "rb")
+    except (IOError, OSError):
+        return None
+
+    with file:
+        index = read_index(file)
+
+        if key not in index:
+            return None
+
+        offset, length = index[key]
+        file.seek(offset)
+
+        return decode_series(file.read(length))
+
+
+def load_history(quarter):
+    """Returns {key: (minutes, seats taken, seats available)} of everything compacted. Only compact needs all of it."""
+
+    try:
+        file = open(store_path(quarter), "rb")
+    except (IOError, OSError):
+        return {}
+
+    with file:
+        history = {}
+
+        for key, (offset, length) in read_index(file).items():
+            file.seek(offset)
+            history[key] = decode_series(file.read(length))
+
+        return history
+
+
+def save_history(history, quarter):
+    """Writes history as history.bin in one go, so a reader sees either the old file or the new one."""
+
+    temp_path = store_path(quarter) + ".tmp"
+    index = {}
+
+    with open(temp_path, "wb") as file:
+        for key in sorted(history):
+            blob = encode_series(history[key])
+            index[key] = [file.tell(), len(blob)]
+            file.write(blob)
+
+        index_offset = file.tell()
+        file.write(json.dumps(index, sort_keys=True, separators=(",", ":")).encode("utf_8"))
+        file.write(INDEX_OFFSET.pack(index_offset))
+
+    os.rename(temp_path, store_path(quarter))
+
+
+def append_sample(history, key, minutes, seats_taken, seats_available):
+    """Adds an encoded sample to the series of key. A scrape that was already recorded is ignored."""
+
+    if key not in history:
+        history[key] = (array("l"), array("l"), array("l"))
+
+    all_minutes, all_taken, all_available = history[key]
+
+    if all_minutes and all_minutes[-1] >= minutes:
+        return
+
+    all_minutes.append(minutes)
+    all_taken.append(seats_taken)
+    all_available.append(seats_available)
+
+
+@timer
+def compact(quarter):
+    """Folds every segment of quarter into history.bin. Run it offline, Ex. nightly: it rewrites the whole history.
+
+    The latest segment is kept, since polls compare against it. Compacting it again later changes nothing.
+    """
+
+    print(color.BOLD + color.DARKCYAN + "### Compacting seat history ###" + color.END)
+
+    history = load_history(quarter)
+    keys = load_keys(quarter)
+    timestamps = segment_timestamps(quarter)
+
+    for timestamp in timestamps:
+        minutes = to_minutes(timestamp)
+
+        for number, taken, available in zip(*read_segment(quarter, timestamp)):
+            append_sample(history, keys[number], minutes, taken, available)
+
+    save_history(history, quarter)
+
+    for timestamp in timestamps[:-1]:
+        os.remove(segment_path(quarter, timestamp))
+
+    print("- Number of segments compacted: " + str(len(timestamps)) + ".")
+    print("- Number of tracked courses and sections: " + str(len(history)) + ".")
+
+
+def iter_samples(final_data):
+    """Yields (key, seats taken, seats available) for every course (by code) and every section with an id (by id)."""
+
+    for code, course in final_data.items():
+        yield code, course["seats"][0], course["seats"][1]
+
+        for group in course["sections"]:
+            for section in group["section"]:
+                if section["id"] != "-":
+                    yield section["id"], section["seats taken"], section["seats available"]
+
+
+def fill_curve(quarter, key, start, end):
+    """Returns [(TIMESTAMP, seats taken, seats available)] for key between the start and end TIMESTAMPs, inclusive.
+
+    Ex. fill_curve("WI19", "CSE 100", 201901060000, 201901122359) for CSE 100 over week 0.
+    Only key's compacted series and the segments between start and end are read.
+    """
+
+    first_minutes, last_minutes = to_minutes(start), to_minutes(end)
+    curve = {}
+
+    series = read_series(quarter, key)
+
+    if series is not None:
+        all_minutes, all_taken, all_available = series
+
+        first = bisect.bisect_left(all_minutes, first_minutes)
+        last = bisect.bisect_right(all_minutes, last_minutes)
+
+        for i in range(first, last):
+            curve[all_minutes[i]] = (all_taken[i], all_available[i])
+
+    keys = load_keys(quarter)
+
+    if key in keys:
+        number = keys.index(key)
+
+        for timestamp in segment_timestamps(quarter):
+            if first_minutes <= to_minutes(timestamp) <= last_minutes:
+                numbers, all_taken, all_available = read_segment(quarter, timestamp)
+
+                try:
+                    i = numbers.index(number)
+                except ValueError:
+                    continue
+
+                curve[to_minutes(timestamp)] = (all_taken[i], all_available[i])
+
+    return [(to_timestamp(minutes), decode_seats(taken), decode_seats(available)) for minutes, (taken, available) in sorted(curve.items())]
+
+
+def structure_path():
+    """Path to what the last full run saved for seats-only polls."""
+
+    return os.path.join(SEATS_DIR, "structure.json")
+
+
+def save_structure(quarter, search, final_data):
+    """Saves what a seats-only poll needs from a full run: the quarter, the search posted, and the section ids."""
+
+    if not os.path.isdir(SEATS_DIR):
+        os.makedirs(SEATS_DIR)
+
+    section_ids = sorted(section["id"] for course in final_data.values() for group in course["sections"]
+                         for section in group["section"] if section["id"] != "-")
+
+    with open(structure_path(), "w") as file:
+        json.dump({"quarter": quarter, "search": search, "sections": section_ids}, file, sort_keys=True)
+
+
+def load_structure():
+    """Returns what save_structure saved."""
+
+    with open(structure_path()) as file:
+        return json.load(file)
+
+
+@timer
+def record_section_seats(section_seats, quarter, timestamp):
+    """Appends the seats of sections ({section id: (taken, available)}) to the seat history of quarter.
+
+    Returns the sections whose seats changed since the latest scrape recorded.
+    """
+
+    print(color.BOLD + color.DARKCYAN + "### 5. Recording seat history ###" + color.END)
+
+    last_seats = latest_seats(quarter)
+
+    changed = dict((section_id, seats) for section_id, seats in section_seats.items() if last_seats.get(section_id) != seats)
+
+    write_segment([(section_id, taken, available) for section_id, (taken, available) in section_seats.items()], quarter, timestamp)
+
+    print("- Number of sections with new seats: " + str(len(changed)) + ".")
+
+    return changed
+
+
+@timer
+def record_seats(final_data, quarter, timestamp):
+    """Appends this scrape's seats to the seat history of quarter."""
+
+    print(color.BOLD + color.DARKCYAN + "### Recording seat history ###" + color.END)
+
+    samples = list(iter_samples(final_data))
+
+    write_segment(samples, quarter, timestamp)
+
+    print("- Number of tracked courses and sections: " + str(len(samples)) + ".")
+
+
+if __name__ == "__main__":
+    # Ex. python seats.py compact WI19
+    # Ex. python seats.py curve WI19 "CSE 100" 201901060000 201901122359
+    if sys.argv[1] == "compact":
+        compact(sys.argv[2])
+    else:
+        for timestamp, seats_taken, seats_available in fill_curve(sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5])):
+            print("- " + str(timestamp) + ": " + str(seats_taken) + "/" + str(seats_available))
@@ -0,0 +1,85 @@
+"""Python file used to keep the output of each department shard of a sharded scrape. Created by Aykan Fonseca."""
+
+# Builtins
+import gzip
+import json
+import os
+
+# Constants
+from constants import SHARDS_DIR
+
+
+def shard_directory(quarter):
+    """Where the shards of quarter are kept. One file per shard plus manifest.json."""
+
+    return os.path.join(SHARDS_DIR, quarter)
+
+
+def shard_path(quarter, subject):
+    """Path to the output of a subject's shard."""
+
+    return os.path.join(shard_directory(quarter), subject + ".json.gz")
+
+
+def load_manifest(quarter):
+    """Returns {subject: {"status": "done" or "failed"}} from the last sharded scrape of quarter."""
+
+    try:
+        with open(os.path.join(shard_directory(quarter), "manifest.json")) as file:
+            return json.load(file)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, quarter):
+    """Saves the status of every shard of quarter."""
+
+    if not os.path.isdir(shard_directory(quarter)):
+        os.makedirs(shard_directory(quarter))
+
+    temp_path = os.path.join(shard_directory(quarter), "manifest.json.tmp")
+
+    with open(temp_path, "w") as file:
+        json.dump(manifest, file, indent=4, sort_keys=True)
+
+    os.rename(temp_path, os.path.join(shard_directory(quarter), "manifest.json"))
+
+
+def save_shard(quarter, subject, shard):
+    """Saves a shard's output: {"pages": [rows of each page], "emails": {teacher: email}}."""
+
+    if not os.path.isdir(shard_directory(quarter)):
+        os.makedirs(shard_directory(quarter))
+
+    temp_path = shard_path(quarter, subject) + ".tmp"
+
+    with gzip.open(temp_path, "wb") as file:
+        file.write(json.dumps(shard, sort_keys=True, separators=(",", ":")).encode("utf_8"))
+
+    os.rename(temp_path, shard_path(quarter, subject))
+
+
+def load_shard(quarter, subject):
+    """Returns what save_shard saved, or None if the shard was never scraped."""
+
+    try:
+        with gzip.open(shard_path(quarter, subject), "rb") as file:
+            return json.loads(file.read().decode("utf_8"))
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def merge_shards(shards):
+    """Merges {subject: shard} into (teacher to email mapping, rows of each page), in subject order.
+
+    The result does not depend on which shards finished first. The rows of every shard start with a NEW_CLASS,
+    so concatenating pages never joins courses of two shards.
+    """
+
+    teacher_email_map, raw_data = {}, []
+
+    for subject in sorted(shards):
+        teacher_email_map.update(shards[subject]["emails"])
+        raw_data.extend(shards[subject]["pages"])
+
+    return teacher_email_map, raw_data
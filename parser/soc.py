@@ -1,24 +1,47 @@
 """Python program to scrape UC San Diego's Schedule of Classes. Created by Aykan Fonseca."""
 
 # Builtins
+import collections
 import itertools
+import json
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import re
+import sys
 import time
 
 # Pip install packages.
 from bs4 import BeautifulSoup
-from firebase import firebase
-import requests
+from bs4.dammit import EncodingDetector
+import lxml.html
 from tqdm import tqdm
 
+# Local modules.
+from aggregate import aggregate_seats, department_rollups
+import cache
+from catalog_index import load_catalog
+from columnar import export_columns
+from dump import write_dump
+from rows import parse_section, parse_exam, NUMBER_REGEX
+import metrics
+from records import Header, Course, CourseGroup, group_to_dict
+from restrictions import format_restrictions, save_table, learned_phrases, add_learned
+from seats import record_seats, record_section_seats, save_structure, load_structure
+from shards import load_manifest, save_manifest, load_shard, save_shard, merge_shards
+import sync
+from journal import page_digest, find_unfinished, read_journal, open_journal, append, finish, discard_journal
+import transport
+import uploader
+
 # Constants
-from constants import color, SOC_URL, SUBJECTS_URL, timer, timer_main, HEADERS, IS_DEI, CONVERT_RESTRICTIONS, CONVERT_RESTRICTIONS_MINIMAL
+from constants import color, FIREBASE_DB2, SOC_URL, SUBJECTS_URL, timer, timer_main, HEADERS, IS_DEI, MAX_WORKERS, EXTRACT_ENGINE, PARSE_PROCESSES, DELTA_SYNC, DUMP_PATH, DEPARTMENTS_PATH, SHARD_WORKERS
 
 # Global Variables.
-SESSION = requests.Session()
+SESSION = transport.Session()
 NUM_PAGES_TO_PARSE = 0
 NUM_COURSES = 0
 TIMESTAMP = int(time.strftime("%Y%m%d%H%M")) # A timestamp for the scrape in year-month-day-hour-minute.
+WORKER_CATALOG = {} # The catalog inside a parse_data worker process.
 
 # Input data besides classes.
 POST_DATA = {
@@ -30,541 +53,723 @@ POST_DATA = {
     "schedOption2": "true"
 }
 
-ONLY_RESTRICTIONS = set(["ER", "FR", "GR", "JR", "LD", "MU", "O", "RE", "SI", "SO", "SR", "TH", "UD", "WA"])
-NOT_RESTRICTIONS = set(["N", "XFR", "XGR", "XJR", "XLD", "XSO", "XSR", "XUD"])
-SPECIAL_RESTRICTIONS = set(["D", "ER", "MU", "O", "RE", "SI", "TH", "WA", "N"])
-APPEND_ONLY_RESTRICTIONS = set(["ER", "MU", "RE", "SI", "TH", "WA", "O"])
+DEPARTMENT_REGEX = re.compile(r"\((.*?)\)")
+ID_REGEX = re.compile(r"(?<!\d)\d{6}(?!\d)") # A 6 digit section ID. Ex. 945848
 
-# Used Custom Sorts. The higher the number, the higher the priority / earlier they appear.
-RESTRICTION_RANKS = {"FR": 5, "XFR": 5, "SO": 4, "XSO": 4, "JR": 3, "XJR": 3, "SR": 2, "XSR": 2, "GR": 1, "XGR": 1}
-SPECIAL_RANKS = {"D": 2, "O": 2, "N": 1, "ER": 1, "MU": 1, "RE": 1, "SI": 1, "TH": 1, "WA": 1}
-DAY_RANKS = {"M": 7, "Tu": 6, "W": 5, "Th": 4, "F": 3, "S": 2, "Su": 1}
 
 
-def rank_sort(first_restriction_code, second_restriction_code):
-    """Orders restrictions by RESTRICTION_RANKS priority."""
-    rank_a = RESTRICTION_RANKS.get(first_restriction_code, 0)
-    rank_b = RESTRICTION_RANKS.get(second_restriction_code, 0)
+def get_quarters():
+    """Gets all the quarters listed in drop down menu."""
 
-    if rank_b > rank_a:
-        return 1
-    elif rank_a > rank_b:
-        return -1
-    else:
-        return 0
+    quarters = cache.fetch(SESSION, SOC_URL, headers=HEADERS)
+    soup = BeautifulSoup(quarters, "lxml").findAll("option")
 
+    return [x["value"] for x in soup if len(x["value"]) == 4 and ":" not in x["value"]]
 
-def special_sort(first_restriction_code, second_restriction_code):
-    """Orders restrictions by SPECIAL_RANKS priority."""
-    rank_a = SPECIAL_RANKS.get(first_restriction_code, 0)
-    rank_b = SPECIAL_RANKS.get(second_restriction_code, 0)
 
-    if rank_b > rank_a:
-        return 1
-    elif rank_a > rank_b:
-        return -1
-    else:
-        return 0
+def get_subjects():
+    """Gets all the subjects from a seconcary source."""
+
+    subjects = cache.fetch(SESSION, SUBJECTS_URL, data={})
+    soup = BeautifulSoup(subjects, "lxml").findAll("td")
 
+    return {"selectedSubjects": [i.text for i in soup if len(i.text) <= 4]}
 
-def day_sort(first_day, second_day):
-    day_rank_a = DAY_RANKS.get(first_day, 0)
-    day_rank_b = DAY_RANKS.get(second_day, 0)
 
-    if day_rank_b > day_rank_a:
-        return 1
-    elif day_rank_a > day_rank_b:
-        return -1
-    else:
-        return 0
+@timer
+def setup(search=True):
+    """Updates post request with quarter and subjects selected. With search, also posts it and gets NUM_PAGES_TO_PARSE."""
+
+    print(color.BOLD + color.DARKCYAN + "### 1. Setup ###" + color.END)
+    print("- Fetching all quarters.")
+    current_quarter = get_quarters()[0]
+    POST_DATA.update({"selectedTerm": current_quarter})
+
+    print("- Fetching all subjects.")
+    POST_DATA.update(get_subjects())
 
+    if search:
+        print("- Updating post.")
+        post_search()
 
-def convert_to_military(time):
-    """Expected format: 2:00a or 4:50p. Converts to military time."""
+    return POST_DATA["selectedTerm"]
 
-    is_pm = True if time[-1] == "p" else False
-    temp = time[:-1].split(":")
 
-    if is_pm:
-        temp[0] = str(int(temp[0]) + 12)
+class MissingPageCount(Exception):
+    """Raised when a search result has no page count. Ex. an error or maintenance page served with status 200."""
+    pass
 
-    return ":".join(temp)
 
+def post_search():
+    """Posts POST_DATA as the search whose result pages get downloaded. Also gets NUM_PAGES_TO_PARSE."""
 
-def get_quarters():
-    """Gets all the quarters listed in drop down menu."""
+    global NUM_PAGES_TO_PARSE
 
-    quarters = SESSION.get(SOC_URL, headers=HEADERS, stream=True)
-    soup = BeautifulSoup(quarters.content, "lxml").findAll("option")
+    post = str(cache.fetch(SESSION, SOC_URL, data=POST_DATA))
+    NUM_PAGES_TO_PARSE = int(re.search(r"of&nbsp;([0-9]*)", post).group(1))
 
-    return [x["value"] for x in soup if len(x["value"]) == 4 and ":" not in x["value"]]
 
+def search_pages(session, search):
+    """Posts search with session. Returns the html of the result and its number of pages.
 
-def get_subjects():
-    """Gets all the subjects from a seconcary source."""
+    Raises MissingPageCount if the result has no page count, rather than taking it for a search with no pages.
+    """
 
-    subjects = requests.post(SUBJECTS_URL)
-    soup = BeautifulSoup(subjects.content, "lxml").findAll("td")
+    post = cache.fetch(session, SOC_URL, data=search)
+    num_pages = re.search(r"of&nbsp;([0-9]*)", str(post))
+
+    if num_pages is None:
+        raise MissingPageCount(", ".join(search["selectedSubjects"]))
+
+    return post, int(num_pages.group(1))
+
+
+def get_page(url, session=SESSION, search=POST_DATA):
+    """Downloads a single page of the search last posted with session and returns its html."""
+
+    # Every page url is the same for any search, so the cache also keys on the search.
+    # Timeouts, retries, and the per host cap on simultaneous requests are handled by the session. See transport.py.
+    post = cache.fetch(session, url, headers=HEADERS, vary=search)
+
+    metrics.count("pages")
+
+    return post
 
-    return {"selectedSubjects": [i.text for i in soup if len(i.text) <= 4]}
+
+def iter_pages(urls, workers=MAX_WORKERS):
+    """Yields the html of each page in page order. At most workers * 2 pages are downloaded ahead."""
+
+    # Every worker shares SESSION, so its connection pool must hold one connection per worker.
+    transport.size_pool(SESSION, workers)
+
+    urls = iter(urls)
+    pool = ThreadPool(workers)
+    pending = collections.deque()
+
+    try:
+        for url in itertools.islice(urls, workers * 2):
+            pending.append(pool.apply_async(get_page, (url,)))
+
+        # Results are taken in the order they were queued, regardless of which finishes first.
+        while pending:
+            page = pending.popleft().get()
+
+            for url in itertools.islice(urls, 1):
+                pending.append(pool.apply_async(get_page, (url,)))
+
+            yield page
+    finally:
+        pool.close()
+        pool.join()
 
 
 @timer
-def setup():
-    """Updates post request with quarter and subjects selected. Also gets NUM_PAGES_TO_PARSE."""
-    
-    global NUM_PAGES_TO_PARSE
+def get_data(urls, workers=MAX_WORKERS):
+    """Downloads all pages in urls with a pool of workers and returns their html in page order."""
 
-    print(color.BOLD + color.DARKCYAN + "### 1. Setup ###" + color.END)
-    print("- Fetching all quarters.")
-    current_quarter = get_quarters()[0]
-    POST_DATA.update({"selectedTerm": current_quarter})
+    print(color.BOLD + color.DARKCYAN + "### 2. Downloading Course Data ###" + color.END)
 
-    print("- Fetching all subjects.")
-    POST_DATA.update(get_subjects())
+    pages = list(tqdm(iter_pages(urls, workers), total=len(urls)))
 
-    print("- Updating post.")
-    post = str(SESSION.post(SOC_URL, data=POST_DATA, stream=True).content)
-    NUM_PAGES_TO_PARSE = int(re.search(r"of&nbsp;([0-9]*)", post).group(1))
+    transport.print_stats()
+    cache.evict()
+
+    return pages
 
-    return POST_DATA["selectedTerm"]
+
+def scrape_shard(quarter, subject, engine=EXTRACT_ENGINE):
+    """Searches a single subject with its own session, then downloads and extracts its pages. Returns the shard."""
+
+    session = transport.Session()
+    search = dict(POST_DATA, selectedTerm=quarter, selectedSubjects=[subject])
+
+    _, num_pages = search_pages(session, search)
+
+    teacher_email_map, pages, current_department = {}, [], None
+
+    for num in range(1, num_pages + 1):
+        page = get_page(SOC_URL + str(num), session, search)
+        parsed_page_data, current_department = extract_page(page, teacher_email_map, current_department, engine)
+
+        metrics.count("rows", len(parsed_page_data))
+        pages.append(parsed_page_data)
+
+    shard = {"pages": pages, "emails": teacher_email_map}
+    save_shard(quarter, subject, shard)
+
+    return shard
 
 
 @timer
-def get_data(urls):
-    """Parses the data of all pages in url_page_tuple and returns the raw post data."""
+def scrape_shards(quarter, subjects, rescrape=False, workers=SHARD_WORKERS):
+    """Scrapes every subject as its own shard, several at once. Returns the teacher to email mapping, the rows of each
+    page, and the subjects left without any output.
 
-    # Cache SESSION to avoid calls to global vars.
-    s = SESSION
-    headers = HEADERS
+    A failed shard does not stop the others. With rescrape, only shards that failed or were never scraped are
+    downloaded again, and the saved output of every other shard is reused as is. Seats keep changing, so a reused
+    shard is as old as the scrape that saved it.
+    """
 
-    print(color.BOLD + color.DARKCYAN + "### 2. Downloading Course Data ###" + color.END)
+    print(color.BOLD + color.DARKCYAN + "### 2. Downloading & Extracting Course Data (by department) ###" + color.END)
 
-    tags = []
-    for url in tqdm(urls):
+    manifest = load_manifest(quarter)
+    shards, failed = {}, []
+
+    if rescrape:
+        for subject in subjects:
+            if manifest.get(subject, {}).get("status") == "done":
+                shard = load_shard(quarter, subject)
+
+                if shard is not None:
+                    shards[subject] = shard
+
+    pending = [subject for subject in subjects if subject not in shards]
+    num_reused = len(shards)
+
+    def run(subject):
         try:
-            post = s.get(url, headers=headers)
-        except requests.exceptions.HTTPError:
-            post = s.get(url, headers=headers)
+            return subject, scrape_shard(quarter, subject), None
+        except Exception as error:
+            return subject, None, error
+
+    pool = ThreadPool(workers)
+
+    try:
+        results = list(tqdm(pool.imap_unordered(run, pending), total=len(pending)))
+    finally:
+        pool.close()
+        pool.join()
+
+    for subject, shard, error in results:
+        if error is None:
+            manifest[subject] = {"status": "done"}
+        else:
+            print("- " + subject + " failed: " + repr(error))
+            failed.append(subject)
+            manifest[subject] = {"status": "failed"}
 
-        tr_tags = BeautifulSoup(post.content, "lxml").findAll("tr")
+            # Better the last good copy of a department than none at all.
+            shard = load_shard(quarter, subject)
 
-        tags.append(tr_tags)
+        if shard is not None:
+            shards[subject] = shard
 
-    return tags
+    save_manifest(manifest, quarter)
+
+    print("- Number of shards: " + str(len(subjects)) + " (" + str(num_reused) + " reused, " + str(len(failed)) + " failed).")
+
+    if failed:
+        print("- Failed shards: " + ", ".join(sorted(failed)) + ". Run with --rescrape to retry only the failed and missing ones.")
+
+    missing = sorted(subject for subject in subjects if subject not in shards)
+
+    if missing:
+        print(color.RED + "- Shards without any output: " + ", ".join(missing) + "." + color.END)
+
+    cache.evict()
+
+    teacher_email_map, raw_data = merge_shards(shards)
+
+    return teacher_email_map, raw_data, missing
+
+
+def is_last_page_unchanged(done_pages):
+    """Downloads the last journaled page again and tells whether it still has the rows that were journaled.
+
+    Rows are compared rather than html, so markup that differs on every download does not count as a change.
+    """
+
+    if not done_pages:
+        return True
+
+    # The page continues the department the page before it ended in.
+    current_department = done_pages[-2]["department"] if len(done_pages) > 1 else None
+
+    page = get_page(SOC_URL + str(len(done_pages)))
+    parsed_page_data, _ = extract_page(page, {}, current_department)
+
+    return page_digest(parsed_page_data) == done_pages[-1].get("digest")
+
+
+def start_journal(quarter):
+    """Posts the search like setup, then opens the journal of this scrape. Returns it and what it already recorded.
+
+    If the latest scrape of quarter did not finish, its search still has as many pages, and its last journaled
+    page still has the same rows, that scrape is resumed under its TIMESTAMP. Otherwise it is dropped and a new
+    journal is started.
+    """
+
+    global TIMESTAMP
+
+    timestamp = find_unfinished(quarter)
+    state = read_journal(quarter, timestamp) if timestamp else None
+
+    if state and state["search"]:
+        POST_DATA.update(state["search"])
+
+    post_search()
+
+    # Journaled pages only line up with the search's pages if it still has as many and they did not shift.
+    is_resumable = state and state["search"] and state["pages"] == NUM_PAGES_TO_PARSE
+
+    if is_resumable and not is_last_page_unchanged(state["done pages"]):
+        print("- Page " + str(len(state["done pages"])) + " changed since it was journaled, starting over.")
+        is_resumable = False
+
+    if is_resumable:
+        print("- Resuming the scrape of " + str(timestamp) + " after page " + str(len(state["done pages"])) + ".")
+        TIMESTAMP = timestamp
+
+        return open_journal(quarter, TIMESTAMP), state
+
+    if timestamp:
+        discard_journal(quarter, timestamp)
+
+    journal = open_journal(quarter, TIMESTAMP)
+    append(journal, {"type": "search", "search": POST_DATA, "pages": NUM_PAGES_TO_PARSE})
+
+    return journal, read_journal(quarter, TIMESTAMP)
 
 
 @timer
-def extract_data(posts):
+def get_rows(urls, journal, done_pages):
+    """Downloads and extracts every page in urls, journaling the rows of each. Returns the teacher to email mapping and the rows of each page.
 
-    # Cache NUM_PAGES_TO_PARSE to avoid calls to global vars.
-    total_pages = NUM_PAGES_TO_PARSE
+    done_pages are the pages a run that died already journaled. Only the pages after them are downloaded.
+    """
 
-    print(color.BOLD + color.DARKCYAN + "### 3. Extracting Relevant Data ###" + color.END)
+    print(color.BOLD + color.DARKCYAN + "### 2. Downloading & Extracting Course Data (journaled) ###" + color.END)
+
+    teacher_email_map, raw_data, current_department = {}, [], None
+
+    for page in done_pages:
+        teacher_email_map.update(page["emails"])
+        raw_data.append(page["rows"])
+        current_department = page["department"]
+
+    remaining_urls = urls[len(done_pages):]
+
+    for num, page in enumerate(tqdm(iter_pages(remaining_urls), total=len(remaining_urls)), len(done_pages) + 1):
+        page_email_map = {}
+        parsed_page_data, current_department = extract_page(page, page_email_map, current_department)
+
+        metrics.count("rows", len(parsed_page_data))
+        append(journal, {
+            "type": "page", "number": num, "rows": parsed_page_data, "emails": page_email_map,
+            "department": current_department, "digest": page_digest(parsed_page_data)
+        })
+
+        teacher_email_map.update(page_email_map)
+        raw_data.append(parsed_page_data)
+
+    transport.print_stats()
+    cache.evict()
+
+    return teacher_email_map, raw_data
+
+
+def clean_text(text):
+    """Collapses whitespace in text. Python 2 gets a utf-8 byte string back, like the rest of the rows."""
+
+    text = " ".join(text.split())
+
+    return text if isinstance(text, str) else text.encode("utf_8")
 
-    raw_data = [] # Contains the parsed page data for each page. 
-    teacher_email_map = {} # Maps teachers to their respective emails.
 
-    for tr_tag_elements in posts:
-        parsed_page_data = []
+def extract_page_bs4(page, teacher_email_map, current_department=None):
+    """Extracts the rows of one page with BeautifulSoup. Returns them with the department the page ends in."""
 
-        for tr_tag in tr_tag_elements:
-            parsed_text = str(" ".join(tr_tag.text.split()).encode("utf_8"))
+    parsed_page_data = []
+    soup = BeautifulSoup(page, "lxml")
 
-            # Changes the current department if tr_tag looks like a department header.
+    for tr_tag in soup.findAll("tr"):
+        parsed_text = clean_text(tr_tag.text)
+
+        # Changes the current department if tr_tag looks like a department header.
+        try:
+            current_department = str(DEPARTMENT_REGEX.search(tr_tag.td.h2.text).group(1))
+        except AttributeError:
+            pass
+
+        # The header of each class: units, department, course number, etc..
+        if "Units" in parsed_text:
+            parsed_page_data.append("NEW_CLASS")
+
+            code = parsed_text.partition(" Prereq")[0]
+
+            parsed_page_data.append(current_department + " " + code)
+
+        # Section and Exam information (and teacher emails).
+        else:
             try:
-                current_department = str(re.search(r"\((.*?)\)", tr_tag.td.h2.text).group(1))
-            except AttributeError:
+                tag_class = tr_tag["class"][0]
+
+                if "nonenrtxt" == tag_class and any(exam_code in parsed_text for exam_code in ("FI", "MI")):
+                    parsed_page_data.append("****" + parsed_text)
+                elif "sectxt" == tag_class and "Cancelled" not in parsed_text:
+                    parsed_page_data.append("...." + parsed_text)
+
+                    # Check for teacher email to add to mapping.
+                    try:
+                        for a_tag in tr_tag.findAll("a"):
+                            teacher_email_map[a_tag.text.strip()] = a_tag["href"][7:].strip()
+                    except TypeError:
+                        pass
+            except KeyError:
                 pass
 
-            # The header of each class: units, department, course number, etc..
-            if "Units" in parsed_text:
-                parsed_page_data.append("NEW_CLASS")
+    # Free the page's DOM now rather than whenever the garbage collector gets to its reference cycles.
+    soup.decompose()
 
-                code = parsed_text.partition(" Prereq")[0]
+    return parsed_page_data, current_department
 
-                parsed_page_data.append(current_department + " " + code)
 
-            # Section and Exam information (and teacher emails).
-            else:
-                try:
-                    tag_class = tr_tag["class"][0]
-
-                    if "nonenrtxt" == tag_class and any(exam_code in parsed_text for exam_code in ("FI", "MI")):
-                        parsed_page_data.append("****" + parsed_text)
-                    elif "sectxt" == tag_class and "Cancelled" not in parsed_text:
-                        parsed_page_data.append("...." + parsed_text)
-
-                        # Check for teacher email to add to mapping.
-                        try:
-                            for a_tag in tr_tag.findAll("a"):
-                                teacher_email_map[a_tag.text.strip()] = a_tag["href"][7:].strip()
-                        except TypeError:
-                            pass
-                except KeyError:
-                    pass
-        
-        raw_data.append(parsed_page_data)
+def html_parser(page):
+    """Returns an lxml parser for the first encoding BeautifulSoup's detector suggests that lxml knows.
 
-    return teacher_email_map, raw_data
+    BeautifulSoup picks its encoding the same way, so both engines see the same text.
+    """
+
+    for encoding in EncodingDetector(page, is_html=True).encodings:
+        try:
+            return lxml.html.HTMLParser(encoding=encoding)
+        except LookupError:
+            pass
+
+    return lxml.html.HTMLParser()
+
+
+def extract_page_lxml(page, teacher_email_map, current_department=None):
+    """Same as extract_page_bs4, but walks lxml's C-level tree directly instead of BeautifulSoup's."""
+
+    parsed_page_data = []
+
+    root = lxml.html.fromstring(page, parser=html_parser(page))
+
+    for tr_tag in root.iter("tr"):
+        parsed_text = clean_text(tr_tag.text_content())
+
+        # Changes the current department if tr_tag looks like a department header.
+        td_tag = tr_tag.find(".//td")
+        h2_tag = td_tag.find(".//h2") if td_tag is not None else None
+
+        if h2_tag is not None:
+            department = DEPARTMENT_REGEX.search(h2_tag.text_content())
+
+            if department:
+                current_department = str(department.group(1))
+
+        # The header of each class: units, department, course number, etc..
+        if "Units" in parsed_text:
+            parsed_page_data.append("NEW_CLASS")
+
+            code = parsed_text.partition(" Prereq")[0]
+
+            parsed_page_data.append(current_department + " " + code)
+
+        # Section and Exam information (and teacher emails).
+        elif tr_tag.get("class"):
+            tag_class = tr_tag.get("class").split()[0]
+
+            if "nonenrtxt" == tag_class and any(exam_code in parsed_text for exam_code in ("FI", "MI")):
+                parsed_page_data.append("****" + parsed_text)
+            elif "sectxt" == tag_class and "Cancelled" not in parsed_text:
+                parsed_page_data.append("...." + parsed_text)
+
+                # Check for teacher email to add to mapping. Stops at the first link without one, like bs4's KeyError.
+                for a_tag in tr_tag.iter("a"):
+                    if a_tag.get("href") is None:
+                        break
+
+                    teacher_email_map[a_tag.text_content().strip()] = a_tag.get("href")[7:].strip()
+
+    return parsed_page_data, current_department
+
+
+EXTRACT_ENGINES = {"bs4": extract_page_bs4, "lxml": extract_page_lxml}
+
+
+def extract_page(page, teacher_email_map, current_department=None, engine=EXTRACT_ENGINE):
+    """Extracts the rows of one page with the given engine ("bs4" or "lxml")."""
+
+    return EXTRACT_ENGINES[engine](page, teacher_email_map, current_department)
+
+
+def iter_extract(posts, teacher_email_map, engine=EXTRACT_ENGINE):
+    """Yields the extracted rows of each page in posts, filling in teacher_email_map along the way."""
+
+    current_department = None
+
+    for page in posts:
+        parsed_page_data, current_department = extract_page(page, teacher_email_map, current_department, engine)
+
+        metrics.count("rows", len(parsed_page_data))
+
+        yield parsed_page_data
 
 
 @timer
-def format_data(lst):
-    """Format the raw data into a particular format."""
+def extract_data(posts, engine=EXTRACT_ENGINE):
+    """Extracts the rows of every page. Returns the teacher to email mapping and the rows of each page."""
+
+    print(color.BOLD + color.DARKCYAN + "### 3. Extracting Relevant Data ###" + color.END)
+
+    teacher_email_map = {} # Maps teachers to their respective emails.
+    raw_data = list(iter_extract(posts, teacher_email_map, engine)) # Contains the parsed page data for each page.
+
+    return teacher_email_map, raw_data
+
+
+def iter_format(lst):
+    """Yields each course (a list of rows) from the rows of each page, skipping cancelled and ID-less ones.
+
+    Rows are grouped on the NEW_CLASS delimiter in a single pass. Whether a course is cancelled or has an ID
+    is noted as its rows go by, so a course is never looked at twice.
+    """
 
     global NUM_COURSES
 
-    print(color.BOLD + color.DARKCYAN + "### 4. Filtering Data (delimiter, cancelled, ID) ###" + color.END)
+    NUM_COURSES = 0
+
+    course, is_cancelled, has_id = [], False, False
+
+    # Flattening first means a course split across two pages is regrouped as one. The None ends the last course.
+    for item in itertools.chain.from_iterable(itertools.chain(lst, [[None]])):
+        if item != "NEW_CLASS" and item is not None:
+            course.append(item)
+
+            if item == "Cancelled":
+                is_cancelled = True
+            elif not has_id and ID_REGEX.search(item):
+                has_id = True
+
+            continue
 
-    print("- Flattening list of lists.")
-    flattened_list = (item for sublist in lst for item in sublist)
+        if course and has_id and not is_cancelled:
+            NUM_COURSES += 1
+            metrics.count("courses")
 
-    print("- Regrouping flattened list by delimiter word.")
-    regrouped_list = (list(y) for x, y in itertools.groupby(flattened_list, lambda word: word == "NEW_CLASS") if not x)
+            yield course
 
-    print("- Removing courses that are cancelled.")
-    not_cancelled_list = (course for course in regrouped_list if "Cancelled" not in course)
+        course, is_cancelled, has_id = [], False, False
 
-    print("- Removing courses that don't have a 6-digit idenficiation code.")
-    cleaned_list = [course for course in not_cancelled_list if re.findall(r"\D(\d{6})\D", str(course))]
 
-    NUM_COURSES = len(list(cleaned_list))
+@timer
+def format_data(lst):
+    """Format the raw data into a particular format."""
+
+    print(color.BOLD + color.DARKCYAN + "### 4. Filtering Data (delimiter, cancelled, ID) ###" + color.END)
+
+    print("- Flattening list of lists, regrouping by delimiter word, and removing cancelled and ID-less courses.")
+    cleaned_list = list(iter_format(lst))
 
     print("- Number of courses: " + str(NUM_COURSES) + ".")
 
     return cleaned_list
 
 
-def format_restrictions(restrictions):
-    """Converts and formats restrictions text. Ex. JR SR => Open to Juniors and Seniors only."""
-    restriction_codes = restrictions.strip().split(" ")
-    num_restrictions = len(restriction_codes)
-    set_restrictions = set(restriction_codes)
-
-    if num_restrictions == 1:
-        return CONVERT_RESTRICTIONS[restriction_codes[0]] + "."
-
-    # If we have two, we need to determine if the language is "and" or "or" and whether to include only.
-    elif num_restrictions == 2:
-        if set_restrictions.issubset(ONLY_RESTRICTIONS):
-            return "Open to " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[0]] + " and " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[1]] + " Only."
-        elif set_restrictions.issubset(NOT_RESTRICTIONS):
-            return "Not open to " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[0]] + " or " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[1]] + "."
-        elif "D" in restriction_codes:
-            converted_restrictions = sorted([CONVERT_RESTRICTIONS[code] for code in restriction_codes])
-            return converted_restrictions[0] + " and " + converted_restrictions[1] + "."
-        else:
-            print("EXCEPTION: MIXTURE of OPEN AND NOT OPEN.")
-            print(restriction_codes)
-            return restrictions
+def parse_course(course, catalog, seen_courses):
+    """Parses a single course into a Course. seen_courses caches headers across courses."""
 
-    # Three and more, we need commas and determine if "and" or "or" and whether to include only.
-    else:
-        converted_restrictions = sorted([CONVERT_RESTRICTIONS_MINIMAL[code] for code in restriction_codes])
-        formatted_restrictions = ""
-
-        # Check to see if we have any special restrictions in our restriction codes. We want those to be displayed first. 
-        if not set_restrictions.isdisjoint(SPECIAL_RESTRICTIONS):
-            restriction_codes.sort(rank_sort)
-            restriction_codes.sort(special_sort)
-
-            if restriction_codes[0] in SPECIAL_RESTRICTIONS:
-                formatted_restrictions += CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[0]] + (" Only" if restriction_codes[0] in APPEND_ONLY_RESTRICTIONS else "") + ", and "
-                set_restrictions = set(restriction_codes[1:])
-
-                if num_restrictions == 3:
-                    if set_restrictions.issubset(ONLY_RESTRICTIONS):
-                        formatted_restrictions += "Open to " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[1]] + " and " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[2]] + " Only."
-                    elif set_restrictions.issubset(NOT_RESTRICTIONS):
-                        formatted_restrictions += "Not open to " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[1]] + " or " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[2]] + "."
-                    else:
-                        print("EXCEPTION: #1 STRANGE CASE")
-                        print(restriction_codes)
-                        return restrictions
-                else:
-                    print("EXCEPTION: #2 STRANGE CASE")
-                    print(restriction_codes)
-                    return restrictions
+    # Components of course.
+    header, sections, midterm, final = None, [], None, None
+
+    for item in course:
+        # Finds class information.
+        if "Units" in item:
+            item = " ".join(item.split())
+            number_location = NUMBER_REGEX.search(item).start()
+            temp = item.partition("( ")
+
+            department = item.partition(" ")[0]
+            code = item[number_location:].partition(" ")[0]
+            proper_code = department + " " + code # Ex. CSE 100.
+
+            if proper_code in seen_courses:
+                header = seen_courses[proper_code]
             else:
-                print("EXCEPTION: #3 STRANGE CASE")
-                print(restriction_codes)
-                return restrictions
+                title = temp[0][len(code) + 1 + number_location:-1]
+                units = temp[2].partition(")")[0][:-6]
+                restrictions = "None."
 
-        # Iterate through all except the last, where we apply special formatting to make it semantically-correct.
-        elif set_restrictions.issubset(ONLY_RESTRICTIONS):
-            restriction_codes.sort(rank_sort)
-            
-            formatted_restrictions += "Open to "
+                # Assign values based on catalog information.
+                catalog_course = catalog.get(proper_code)
 
-            for code in restriction_codes[:-1]:
-                formatted_restrictions += CONVERT_RESTRICTIONS_MINIMAL[code] + ", "
-            
-            formatted_restrictions += "and " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[-1]] + " Only."
+                try:
+                    description = catalog_course["description"]
+                    prerequisites = catalog_course["prerequisites"]
+                    title = catalog_course["title"]
+                except TypeError:
+                    description = "None given."
+                    prerequisites = "None."
+
+                # Assign formatted restrictions if there are any. format_restrictions is a table lookup.
+                if number_location != len(department) + 1:
+                    restrictions = format_restrictions(item[len(department) + 1: number_location - 1])
+
+                header = Header(proper_code, units, restrictions, description, prerequisites, title)
+                seen_courses[proper_code] = header
+
+        # Section information.
+        elif "...." in item:
+            sections.append(parse_section(item))
+
+        # Finds Final / Midterm Info.
+        elif "****" in item:
+            exam = parse_exam(item)
+
+            if exam.meeting_type == "FI":
+                final = exam
+            else:
+                midterm = exam
 
-        # Iterate through all except the last, where we apply special formatting to make it semantically-correct.
-        elif set_restrictions.issubset(NOT_RESTRICTIONS):
-            restriction_codes.sort(rank_sort)
+    return Course(header, sections, midterm, final)
 
-            formatted_restrictions += "Not open to "
 
-            for code in restriction_codes[:-1]:
-                formatted_restrictions += CONVERT_RESTRICTIONS_MINIMAL[code] + ", "
-            
-            formatted_restrictions += "or " + CONVERT_RESTRICTIONS_MINIMAL[restriction_codes[-1]] + "."
+def iter_parse(formatted_data, catalog):
+    """Yields each course parsed into its readable values. Catalog comes from load_catalog."""
 
-        else:
-            print("EXCEPTION: MIXTURE of OPEN AND NOT OPEN")
-            print(restriction_codes)
-            return restrictions
-        
-        return formatted_restrictions
+    seen_courses = {}
+
+    for course in formatted_data:
+        yield parse_course(course, catalog, seen_courses)
+
+
+def init_parse_worker(catalog):
+    """Gives a parse_data worker process its copy of the catalog, once rather than with every chunk."""
+
+    global WORKER_CATALOG
+
+    WORKER_CATALOG = catalog
+
+
+def parse_chunk(chunk):
+    """Parses a chunk of courses in a parse_data worker process. Returns the courses, the restriction phrases the
+    process learned so far, and the cache hits and misses of this chunk."""
+
+    before = metrics.cache_info()
+    parsed_chunk = list(iter_parse(chunk, WORKER_CATALOG))
+    after = metrics.cache_info()
+
+    cache_stats = dict((name, {"hits": info["hits"] - before[name]["hits"], "misses": info["misses"] - before[name]["misses"]})
+                       for name, info in after.items())
+
+    return parsed_chunk, learned_phrases(), cache_stats
+
+
+def print_cache_stats(cache_stats):
+    """Prints the hits and misses of every memoized function. Ex. {"sort_days": {"hits": 29065, "misses": 5}}"""
+
+    for name, info in sorted(cache_stats.items()):
+        print("- " + name + " cache: " + str(info["hits"]) + " hits, " + str(info["misses"]) + " misses.")
+
+
+def merge_headers(parsed_data):
+    """Gives each course the header of the first course with its code, like seen_courses does in a single process."""
+
+    seen_headers = {}
+
+    for course in parsed_data:
+        course.header = seen_headers.setdefault(course.header.code, course.header)
 
 
 @timer
-def parse_data(formatted_data):
-    """Parses the courses into their readable values to store in database."""
+def parse_data(formatted_data, catalog, processes=PARSE_PROCESSES):
+    """Parses the courses into their readable values to store in database. Catalog comes from load_catalog.
+
+    With more than one process, formatted_data is split into chunks parsed by a process pool. The result is
+    identical to parsing in a single process.
+    """
 
     print(color.BOLD + color.DARKCYAN + "### 5. Parsing Data ###" + color.END)
 
-    result = []
-    database = firebase.FirebaseApplication(FIREBASE_DB)
-    seen_courses = {}
-    seen_restrictions = {}
-    seen_times = {}
-
-    for course in tqdm(formatted_data):
-        # Components of course.
-        header, sections, midterm, final = {}, [], {}, {}
-
-        number_regex = re.compile(r"\d+")
-        days_regex = re.compile(r"[A-Z][^A-Z]*")
-
-        for item in course:
-            # Finds class information.
-            if "Units" in item:
-                item = " ".join(item.split())
-                number_location = number_regex.search(item).start()
-                temp = item.partition("( ")
-
-                department = item.partition(" ")[0]
-                code = item[number_location:].partition(" ")[0]
-                proper_code = department + " " + code # Ex. CSE 100.
-
-                if proper_code in seen_courses:
-                    header.update(seen_courses[proper_code])
-                else:
-                    title = temp[0][len(code) + 1 + number_location:-1]
-                    header["code"] = proper_code
-                    header["units"] = temp[2].partition(")")[0][:-6]
-                    header["restrictions"] = "None."
-
-                    # Assign values based on catalog information.
-                    catalog_course = database.get("/catalog/" + header["code"], None)
+    if processes <= 1:
+        parsed_data = list(iter_parse(tqdm(formatted_data), catalog))
 
-                    try:
-                        header["description"] = catalog_course["description"]
-                        header["prerequisites"] = catalog_course["prerequisites"]
-                        header["title"] = catalog_course["title"]
-                    except TypeError:
-                        header["description"] = "None given."
-                        header["prerequisites"] = "None."
-                        header["title"] = title
-
-                    # Assign formatted restrictions if there are any. Use a cache. 
-                    if number_location != len(department) + 1:
-                        restrictions = item[len(department) + 1: number_location - 1]
-
-                        if restrictions in seen_restrictions:
-                            header["restrictions"] = seen_restrictions[restrictions]
-                        else:
-                            header["restrictions"] = format_restrictions(restrictions)
-
-                    seen_courses[proper_code] = header
-
-            # Section information. We also assign header["is_waitlist"] here.
-            elif "...." in item:
-                # Assign a default value to all components of a section row.
-                section = {"id": "-", "meeting type": "-", "number": "-", "days": "-", "start time": "TBA", "end time": "TBA", "building": "-", "room": "-", "name": "-", "seats taken": "-", "seats available": "-"}
-
-                number_location = number_regex.search(item).start()
-                section_line_info = item.split(" ")
-
-                # IDs are the 6 digi unique identification code. Ex: 945848
-                if number_location == 4:
-                    section["id"] = item[4:10].strip()
-                    section_line_info = section_line_info[1:]
-                else:
-                    section_line_info[0] = section_line_info[0][4:]
-
-                # Meeting type (ex. LE) and section number (ex. A00).
-                section["meeting type"] = section_line_info[0]
-                section["number"] = section_line_info[1]
-                section_line_info = section_line_info[2:]
-
-                # Day. Otherwise, section["days"] is in a list: ["M", "Tu", "W"] etc.
-                if section_line_info[0] != "TBA":
-                    section["days"] = days_regex.findall(section_line_info[0])
-                    section["days"].sort(day_sort)
-                    section["days"] = "".join(section["days"])
-
-                    section_line_info = section_line_info[1:]
-
-                # Time. Format is military time, so: 23:50 means 11:50pm. 
-                if section_line_info[0] != "TBA":
-                    times = section_line_info[0].partition("-")[::2]
-
-                    # Use a cache.
-                    if times[0] in seen_times:
-                        section["start time"] = seen_times[times[0]]
-                    else:
-                        section["start time"] = convert_to_military(times[0])
-                        
-                    if times[1] in seen_times:
-                        section["end time"] = seen_times[times[1]]
-                    else:
-                        section["end time"] = convert_to_military(times[1])
-
-                    section_line_info = section_line_info[1:]
-
-                # Adjust list because time was given, but not building or room.
-                if len(section_line_info) > 1 and (section_line_info[0] == section_line_info[1] == "TBA"):
-                    section_line_info = section_line_info[1:]
-
-                if section_line_info[0] != "TBA":
-                    section["building"] = section_line_info[0]
-                    section["room"] = section_line_info[1] 
-                    section_line_info = section_line_info[2:]
-                
-                # Rejoin list so we can extract the name.
-                section_line_info = " ".join(section_line_info)
+        print_cache_stats(metrics.cache_info())
 
-                try:
-                    number_location = number_regex.search(section_line_info).start()
-                except AttributeError:
-                    number_location = 0
-                
-                # Handles Name, Seats Taken, and Seats Available.
-                # Waitlist Full, the seats taken is the amount over plus the seats available.
-                if "FULL" in section_line_info:
-                    # Get the Name
-                    seat_info_location = section_line_info.find("FULL")
-                    if seat_info_location != 0:
-                        if "Staff" in section_line_info:
-                            section["name"] = "Staff"
-                        else:
-                            section["name"] = section_line_info[:seat_info_location - 1]
-                    
-                    # Adjust String.
-                    section_line_info = section_line_info[seat_info_location:]
-
-                    # Seat information.
-                    left_parens_location = section_line_info.find("(")
-                    right_parens_location = section_line_info.find(")")
-
-                    taken = int(section_line_info[left_parens_location + 1:right_parens_location])
-                    available = int(section_line_info[right_parens_location + 2:])
-
-                    section["seats taken"] = taken + available
-                    section["seats available"] = available
-
-                # Unlimited seats.
-                elif "Unlim" in section_line_info:
-                    # Check if "TBA" is first value. If so, ignore.
-                    if "TBA" == section_line_info[0:3]:
-                        section_line_info = section_line_info[4:]
-
-                    # Get the Name
-                    if "Staff " in section_line_info:
-                        section["name"] = "Staff"
-                    else:
-                        section["name"] = section_line_info[:section_line_info.find("Unlim") - 1]
-
-                    # Seat information. We don't assign to header["is_waitlist"] which already has a default value of false.
-                    section["seats taken"] = "Unlimited"
-                    section["seats available"] = "Unlimited"
-
-                # Has name and seats. Usual Case.
-                elif number_location != 0:
-                    # Get the name.
-                    section["name"] = section_line_info[:number_location].strip()
-
-                    # Adjust the string.
-                    temp2 = section_line_info[number_location:].strip().split(" ")
-
-                    # Seat information.
-                    section["seats taken"] = int(temp2[0])
-                    section["seats available"] = int(temp2[1])
-
-                # Has name or seats. Unusual Case.
-                else:
-                    # Name is present. Ex. Gillespie, Gary has a comma. But Staff won't. So we look for either.
-                    if "," in section_line_info or section_line_info.strip() == "Staff": 
-                        section["name"] = section_line_info.strip()
-                    
-                    # Seat info but no name. Think discussion sections without teacher name. 
-                    # Also, rarely, there's a case where there's no number and everything is just "TBA".
-                    # Avoid that case by explicitly checking here.
-                    elif number_location == 0 and section_line_info and section_line_info != "TBA":
-                        try:
-                            temp2 = section_line_info.split(" ")
-
-                            section["seats taken"] = int(temp2[0])
-                            section["seats available"] = int(temp2[1])
-
-                        except IndexError:
-                            print("ERROR")
-                
-                # Add section.
-                sections.append(section)
-
-            # Finds Final / Midterm Info.
-            elif "****" in item:
-                # Assign a default value to all components of a exam row.
-                exam = {"id": "-", "meeting type": "-", "number": "-", "days": "-", "start time": "TBA", "end time": "TBA", "building": "-", "room": "-", "name": "-", "seats taken": "-", "seats available": "-"}
-                exam_line_info = item.split(" ")
-
-                # Section number (ex. A00) and Days (which should only be one day).
-                exam["number"] = exam_line_info[1]
-                exam["days"] = exam_line_info[2]
-
-                # Building & Room.
-                if len(exam_line_info) == 6:
-                    exam["building"] = exam_line_info[4]
-                    exam["room"] = exam_line_info[5]
-                
-                # The start and end times.
-                if exam_line_info[3] != "TBA":
-                    times = exam_line_info[3].partition("-")[::2]
-
-                    # Use a cache.
-                    if times[0] in seen_times:
-                        exam["start time"] = seen_times[times[0]]
-                    else:
-                        exam["start time"] = convert_to_military(times[0])
-                        
-                    if times[1] in seen_times:
-                        exam["end time"] = seen_times[times[1]]
-                    else:
-                        exam["end time"] = convert_to_military(times[1])
-                
-                if "FI" in item:
-                    exam["meeting type"] ="FI"
-                    final = exam
-                else:
-                    exam["meeting type"] ="MI"
-                    midterm = exam
-        
-        parsed_result = {
-            "sections": sections, "midterm": midterm, "final": final, 
-            "seats": (section["seats taken"], section["seats available"])
-        }
-
-        parsed_result.update(header)
-
-        result.append(parsed_result)
-
-    return result
+        # Keeps restriction strings seen for the first time this run.
+        save_table()
+
+        return parsed_data
+
+    # Several chunks per process keeps every process busy when some chunks are slower than others.
+    chunk_size = max(1, len(formatted_data) // (processes * 4))
+    chunks = [formatted_data[i:i + chunk_size] for i in range(0, len(formatted_data), chunk_size)]
+
+    pool = multiprocessing.Pool(processes, init_parse_worker, (catalog,))
+
+    parsed_data, cache_stats = [], {}
+
+    try:
+        # imap yields chunks in their original order.
+        for parsed_chunk, learned, chunk_stats in tqdm(pool.imap(parse_chunk, chunks), total=len(chunks)):
+            parsed_data.extend(parsed_chunk)
+            add_learned(learned)
+
+            for name, info in chunk_stats.items():
+                totals = cache_stats.setdefault(name, {"hits": 0, "misses": 0})
+                totals["hits"] += info["hits"]
+                totals["misses"] += info["misses"]
+    finally:
+        pool.close()
+        pool.join()
+
+    # Each process only remembered the headers it saw itself.
+    merge_headers(parsed_data)
+
+    print_cache_stats(cache_stats)
+
+    # Keeps restriction strings the worker processes saw for the first time this run.
+    save_table()
+
+    return parsed_data
+
+
+@timer
+def stream_data(urls, catalog):
+    """Runs stages 2 through 5 one page at a time, so memory holds a few pages rather than all of them."""
+
+    print(color.BOLD + color.DARKCYAN + "### 2. Streaming Course Data (download, extract, filter, parse) ###" + color.END)
+
+    teacher_email_map = {}
+
+    pages = tqdm(iter_pages(urls), total=len(urls))
+    raw_data = iter_extract(pages, teacher_email_map)
+    formatted_data = iter_format(raw_data)
+    parsed_data = iter_parse(formatted_data, catalog)
+
+    # Grouping pulls every course through the generators above.
+    grouped_data = compute_meta_data(parsed_data)
+
+    print("- Number of courses: " + str(NUM_COURSES) + ".")
+
+    cache.evict()
+    save_table()
+
+    return teacher_email_map, grouped_data
+
+
+@timer
+def extract_seats(raw_data, section_ids):
+    """Returns {section id: (seats taken, seats available)} for every row of a section in section_ids."""
+
+    print(color.BOLD + color.DARKCYAN + "### 4. Extracting Seats ###" + color.END)
+
+    section_seats = {}
+
+    for parsed_page_data in raw_data:
+        for item in parsed_page_data:
+            # Only rows of sections with an id have one here. Ex. "....945848 LE A00 ..."
+            if item[4:10] in section_ids:
+                section = parse_section(item)
+                section_seats[section.id] = (section.seats_taken, section.seats_available)
+
+    metrics.count("sections", len(section_seats))
+
+    print("- Number of sections: " + str(len(section_seats)) + ".")
+
+    return section_seats
 
 
 @timer
@@ -573,112 +778,178 @@ def compute_meta_data(parse_data):
 
     print(color.BOLD + color.DARKCYAN + "### 5. Computing Meta data & Grouping ###" + color.END)
 
-    grouped, seen = {}, {}
+    grouped = {}
 
+    # A code listed in more than one block gets every block, and their seats are summed.
     for course in parse_data:
-        if course["code"] in seen:
-            grouped[course["code"]]["seats"].append(course["seats"])
-            grouped[course["code"]]["sections"].append(
-                {
-                    "section": course["sections"],
-                    "midterm": course["midterm"],
-                    "final": course["final"]
-                }
-            )
+        code = course.header.code
 
+        if code in grouped:
+            grouped[code].courses.append(course)
         else:
-            grouped[course["code"]] = {
-                "title": course["title"],
-                "description": course["description"],
-                "prerequisites": course["prerequisites"],
-                "restrictions": course["restrictions"],
-                "units": course["units"],
-                "dei": "true" if course["code"] in IS_DEI else "false",
-                "seats": [course["seats"]],
-                "sections": [
-                    { 
-                        "section": course["sections"],
-                        "midterm": course["midterm"],
-                        "final": course["final"]
-                    }
-                ]
-            }
-    
-    for code, value in grouped.items():
-        waitlist = "false"
-        seats_taken = 0
-        seats_available = 0
-
-        for (taken, available) in value["seats"]:
-            if taken == "Unlimited" or available == "Unlimited":
-                seats_taken = "Unlimited"
-                seats_available = "Unlimited"
-                break
-            elif taken != "-" or available != "-":
-                seats_taken += taken
-                seats_available += available
-        
-        if seats_taken == "Unlimited" or seats_available == "Unlimited" or seats_taken >= seats_available:
-            waitlist = "true"
-
-        # value["seats"] = {TIMESTAMP: (seats_taken, seats_available)}
-        value["seats"] = (seats_taken, seats_available)
-        value["waitlisted"] = waitlist
+            grouped[code] = CourseGroup(course.header, code in IS_DEI, [course])
+
+    # Every course's seats are totaled at once rather than group by group.
+    groups = list(grouped.values())
+    totals, waitlisted = aggregate_seats([[course.seats for course in group.courses] for group in groups])
+
+    for group, seats, is_waitlisted in zip(groups, totals, waitlisted):
+        # The seats over time are kept by seats.record_seats.
+        group.seats = seats
+        group.waitlisted = is_waitlisted
+
+    print("- Number of waitlisted courses: " + str(sum(waitlisted)) + ".")
 
     return grouped
 
 
+def export_data(grouped):
+    """Turns the course groups of compute_meta_data into the dictionaries written to the database."""
+
+    return dict((code, group_to_dict(group)) for code, group in grouped.items())
+
+
 @timer
-def write_to_db(dictionary, quarter):
-    """ Adds data to firebase."""
+def write_to_db(dictionary, quarter, delta_sync=DELTA_SYNC, journal=None, uploaded_batches=None):
+    """ Adds data to firebase. With delta_sync, only the paths that changed since the last upload are sent.
 
-    print(color.BOLD + color.DARKCYAN + "### 6. Writing information to database ###" + color.END)
+    With a journal, every batch sent is recorded, and the batches in uploaded_batches ({path: batch numbers}) are skipped.
+    """
 
-    database = firebase.FirebaseApplication(FIREBASE_DB2)
+    print(color.BOLD + color.DARKCYAN + "### 6. Writing information to database ###" + color.END)
 
     path = "/quarter/" + quarter + "/"
 
-    for key in tqdm(dictionary):
-        database.put(path, key, dictionary[key])
+    if delta_sync:
+        uploaded = sync.normalize(dictionary)
+
+        print("- Computing changes since the last upload.")
+        updates = sync.compute_delta(sync.read_snapshot(quarter), uploaded)
+
+        print("- Number of changed paths: " + str(len(updates)) + ".")
+    else:
+        updates = dictionary
+
+    if journal is not None:
+        on_batch = lambda number: append(journal, {"type": "upload", "path": path, "batch": number})
+    else:
+        on_batch = None
+
+    uploader.upload(FIREBASE_DB2, path, updates, done=(uploaded_batches or {}).get(path, ()), on_batch=on_batch)
 
-    path = "/"
+    # Only remember what was uploaded once every batch made it.
+    if delta_sync:
+        sync.write_snapshot(uploaded, quarter)
 
-    database.put(path, "current", quarter)
+    uploader.upload(FIREBASE_DB2, "/", {"current": quarter})
 
 
 @timer_main
 def main():
     write_access = False
     download_access = True
+    stream_access = False
+    seat_access = True
+    column_access = True
+    shard_access = "--shards" in sys.argv or "--rescrape" in sys.argv # Each department gets its own search.
+    journal_access = True # Journal pages and uploads, so a run that dies resumes where it stopped.
+
+    # Stream and sharded scrapes have no pages to journal. Sharded ones keep their own progress.
+    journal_access = journal_access and not (stream_access or shard_access)
 
-    quarter = setup()
+    # The search is posted below. A sharded scrape posts one per department instead.
+    quarter = setup(search=False)
+
+    if journal_access:
+        journal, state = start_journal(quarter)
+    elif not shard_access:
+        post_search()
 
     page_numbers = range(1, NUM_PAGES_TO_PARSE + 1)
     # page_numbers = range(1, 70)
 
     urls = [SOC_URL + str(num) for num in page_numbers]
+    missing_subjects = [] # Departments a sharded scrape has no output for.
+
+    if stream_access and not shard_access:
+        catalog = load_catalog()
+
+        teacher_email_map, grouped_data = stream_data(urls, catalog)
+    else:
+        if shard_access:
+            teacher_email_map, raw_data, missing_subjects = scrape_shards(quarter, POST_DATA["selectedSubjects"], "--rescrape" in sys.argv)
+        elif journal_access:
+            teacher_email_map, raw_data = get_rows(urls, journal, state["done pages"])
+        else:
+            pages = get_data(urls)
+
+            teacher_email_map, raw_data = extract_data(pages)
 
-    tags = get_data(urls)
+        formatted_data = format_data(raw_data)
 
-    teacher_email_map, raw_data = extract_data(tags)
+        catalog = load_catalog()
 
-    formatted_data = format_data(raw_data)
+        parsed_data = parse_data(formatted_data, catalog)
 
-    parsed_data = parse_data(formatted_data)
+        grouped_data = compute_meta_data(parsed_data)
 
-    final_data = compute_meta_data(parsed_data)
+    final_data = export_data(grouped_data)
 
     if download_access:
-        with open("check.txt", "w+") as file:
-            for k, v in final_data.items():
-                file.write(str(k))
-                file.write(str(v))
-                file.write("\n")
-                file.write("\n")
+        write_dump(final_data, DUMP_PATH)
 
-    if write_access:
-        write_to_db(final_data, quarter)
+        with open(DEPARTMENTS_PATH, "w") as file:
+            json.dump(department_rollups(grouped_data), file, indent=4, sort_keys=True)
+
+    if seat_access:
+        record_seats(final_data, quarter, TIMESTAMP)
+        save_structure(quarter, POST_DATA, final_data)
+
+    if column_access:
+        export_columns(grouped_data, quarter)
+
+    # An upload without a department would delete all of its courses from the database.
+    if write_access and missing_subjects:
+        print(color.RED + "- Not writing to the database, since " + ", ".join(missing_subjects) + " would be deleted." + color.END)
+    elif write_access:
+        if journal_access:
+            write_to_db(final_data, quarter, journal=journal, uploaded_batches=state["uploads"])
+        else:
+            write_to_db(final_data, quarter)
+
+    # Seats and uploads are safe to redo under the same TIMESTAMP, so the journal is only needed until here.
+    if journal_access:
+        finish(journal, quarter, TIMESTAMP)
+
+
+@timer_main
+def poll():
+    """Refreshes only the seats of the sections found by the last full run of main. Run with --seats-only.
+
+    Skips fetching quarters, subjects, and the catalog, and parsing headers, exams, and restrictions.
+    Sections added since the last full run are picked up by the next one.
+    """
+
+    structure = load_structure()
+    quarter = structure["quarter"]
+
+    print(color.BOLD + color.DARKCYAN + "### 1. Setup (from the last full run) ###" + color.END)
+    POST_DATA.update(structure["search"])
+    post_search()
+
+    urls = [SOC_URL + str(num) for num in range(1, NUM_PAGES_TO_PARSE + 1)]
+
+    pages = get_data(urls)
+
+    teacher_email_map, raw_data = extract_data(pages, EXTRACT_ENGINE)
+
+    section_seats = extract_seats(raw_data, set(structure["sections"]))
+
+    return record_section_seats(section_seats, quarter, TIMESTAMP)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--seats-only" in sys.argv:
+        poll()
+    else:
+        main()
@@ -0,0 +1,78 @@
+"""Python file used to upload only the data that changed since the last upload. Created by Aykan Fonseca."""
+
+# Builtins
+import json
+import os
+
+# Constants
+from constants import SYNC_DIR
+
+
+def normalize(data):
+    """Returns data as it looks after a JSON round trip (tuples become lists), which is how the database stores it."""
+
+    return json.loads(json.dumps(data))
+
+
+def snapshot_path(quarter):
+    """Path to the snapshot of the last data uploaded for quarter."""
+
+    return os.path.join(SYNC_DIR, quarter + ".json")
+
+
+def read_snapshot(quarter):
+    """Returns the last data uploaded for quarter, or an empty dictionary if nothing was uploaded yet."""
+
+    try:
+        with open(snapshot_path(quarter)) as file:
+            return json.load(file)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def write_snapshot(data, quarter):
+    """Saves data as the last data uploaded for quarter."""
+
+    if not os.path.isdir(SYNC_DIR):
+        os.makedirs(SYNC_DIR)
+
+    temp_path = snapshot_path(quarter) + ".tmp"
+
+    with open(temp_path, "w") as file:
+        json.dump(data, file, sort_keys=True)
+
+    # Rename so an interrupted write never leaves a half-written snapshot behind.
+    os.rename(temp_path, snapshot_path(quarter))
+
+
+def compute_delta(old, new, path=""):
+    """Returns {path: value} for each value in new that differs from old, and {path: None} for each one removed.
+
+    Paths are slash-separated, like "CSE 100/sections/0/section/1/seats taken", the form the database's
+    multi-path updates accept. Lists of equal length are compared element by element. Anything else that
+    differs is replaced whole.
+    """
+
+    delta = {}
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            if key not in old:
+                delta[path + key] = value
+            elif old[key] != value:
+                delta.update(compute_delta(old[key], value, path + key + "/"))
+
+        for key in old:
+            if key not in new:
+                delta[path + key] = None
+
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for index, (old_value, new_value) in enumerate(zip(old, new)):
+            if old_value != new_value:
+                delta.update(compute_delta(old_value, new_value, path + str(index) + "/"))
+
+    elif old != new:
+        delta[path.rstrip("/")] = new
+
+    return delta
+
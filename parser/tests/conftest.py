@@ -0,0 +1,16 @@
+"""Lets the tests import the parser's modules the way its scripts do. Ex. import soc"""
+
+# Builtins
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name):
+    """Returns the bytes of a fixture, the way pages come back from the cache."""
+
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as file:
+        return file.read()
@@ -0,0 +1,45 @@
+"""Tests that department rollups and course fill ratios come out the same with and without NumPy."""
+
+# Local modules.
+from records import CourseGroup
+import aggregate
+
+
+def group(seats, waitlisted):
+    course_group = CourseGroup(None, False, [])
+    course_group.seats = seats
+    course_group.waitlisted = waitlisted
+
+    return course_group
+
+
+GROUPED = {
+    "CSE 100": group((30, 40), False),
+    "CSE 101": group((40, 40), True),
+    "CSE 199": group(("Unlimited", "Unlimited"), True),
+    "MATH 20A": group(("-", "-"), False),
+    "MATH 295": group((0, 0), True),
+}
+
+
+def test_course_fill_ratios():
+    assert aggregate.course_fill_ratios(GROUPED) == {
+        "CSE 100": 0.75, "CSE 101": 1.0, "CSE 199": None, "MATH 20A": None, "MATH 295": None
+    }
+
+
+def test_rollups_with_and_without_numpy(monkeypatch):
+    rollups = aggregate.department_rollups(GROUPED)
+
+    assert rollups["CSE"] == {
+        "courses": 3, "waitlisted": 2, "unlimited": 1, "seats taken": 70, "seats available": 80, "fill ratio": 0.875,
+        "course fill ratios": {"CSE 100": 0.75, "CSE 101": 1.0, "CSE 199": None}
+    }
+    assert rollups["MATH"]["course fill ratios"] == {"MATH 20A": None, "MATH 295": None}
+
+    monkeypatch.setattr(aggregate, "numpy", None)
+
+    assert aggregate.department_rollups(GROUPED) == rollups
+    assert aggregate.course_fill_ratios(GROUPED) == {
+        "CSE 100": 0.75, "CSE 101": 1.0, "CSE 199": None, "MATH 20A": None, "MATH 295": None
+    }
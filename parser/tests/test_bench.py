@@ -0,0 +1,14 @@
+"""Tests that the stages still turn the benchmark corpus into its golden snapshot."""
+
+# Local modules.
+import bench
+import soc
+
+
+def test_corpus_matches_golden(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    teacher_email_map, raw_data = soc.extract_data(bench.load_corpus())
+    parsed_data = soc.parse_data(soc.format_data(raw_data), {})
+
+    assert bench.check_golden(soc.export_data(soc.compute_meta_data(parsed_data)))
@@ -0,0 +1,20 @@
+"""Tests that section times become the right minutes of the day in the columns."""
+
+# Local modules.
+from columnar import time_to_minutes
+from rows import parse_section
+
+
+def test_time_to_minutes():
+    assert time_to_minutes("9:00") == 540
+    assert time_to_minutes("17:30") == 1050
+    assert time_to_minutes("TBA") == -1
+
+
+def test_noon_sections():
+    # convert_to_military writes 12:xx p.m. as 24:xx, which the columns must read as noon.
+    section = parse_section("....945860 LE A00 MWF 12:00p-12:50p CENTR 115 Gillespie, Gary 120 150")
+    assert (time_to_minutes(section.start_time), time_to_minutes(section.end_time)) == (720, 770)
+
+    section = parse_section("....945861 LE A00 TuTh 11:00a-12:20p WLH 2001 Staff 10 20")
+    assert (time_to_minutes(section.start_time), time_to_minutes(section.end_time)) == (660, 740)
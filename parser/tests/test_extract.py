@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Tests that both extraction engines read a Schedule of Classes page the same way."""
+
+# Local modules.
+from conftest import read_fixture
+import soc
+
+
+def extract(engine):
+    """Extracts the fixture page twice in a row, so the department carries over from the first page to the second."""
+
+    page = read_fixture("soc_page.html")
+    teacher_email_map = {}
+    rows = list(soc.iter_extract([page, page], teacher_email_map, engine))
+
+    return rows, teacher_email_map
+
+
+def test_engines_extract_identical_rows():
+    bs4_rows, _ = extract("bs4")
+    lxml_rows, _ = extract("lxml")
+
+    assert bs4_rows == lxml_rows
+
+
+def test_engines_extract_identical_emails():
+    _, bs4_email_map = extract("bs4")
+    _, lxml_email_map = extract("lxml")
+
+    assert bs4_email_map == lxml_email_map
+
+
+def test_extracted_page():
+    for engine in soc.EXTRACT_ENGINES:
+        rows, teacher_email_map = extract(engine)
+
+        # The department header sets the department of the courses after it, and rows without a class are skipped.
+        assert rows[0][:2] == ["NEW_CLASS", "CSE  JR SR 100 Advanced Data Structure ( 4 Units)"]
+        assert "MATH  FR SO 20A Calculus/Science & Engineering ( 4 Units)" in rows[0]
+        assert not any("Note" in row for row in rows[0])
+
+        # Cancelled sections are dropped, exams are kept.
+        assert not any("945902" in row for row in rows[0])
+        assert "****MI 11/02/2018 F TBA" in rows[0]
+
+        # Non-ASCII names survive, and a link without an href ends the row's emails.
+        assert teacher_email_map == {
+            u"Gillespie, Gary": "ggillespie@ucsd.edu",
+            u"Núñez, José": "jnunez@ucsd.edu",
+            u"Café, Zoë": "cafe@ucsd.edu"
+        }
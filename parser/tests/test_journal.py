@@ -0,0 +1,48 @@
+"""Tests that a journaled scrape is resumed only while its last journaled page still has the same rows."""
+
+# Local modules.
+from conftest import read_fixture
+import journal
+import soc
+
+
+def journal_first_page(quarter, timestamp, page):
+    """Journals a scrape of 2 pages that died after page 1."""
+
+    rows, department = soc.extract_page(page, {})
+
+    file = journal.open_journal(quarter, timestamp)
+    journal.append(file, {"type": "search", "search": {"selectedTerm": quarter}, "pages": 2})
+    journal.append(file, {"type": "page", "number": 1, "rows": rows, "emails": {}, "department": department, "digest": journal.page_digest(rows)})
+    file.close()
+
+
+def start(monkeypatch, page):
+    monkeypatch.setattr(soc, "get_page", lambda url: page)
+    journal_file, state = soc.start_journal("WI19")
+    journal_file.close()
+
+    return state
+
+
+def test_resume_only_if_last_page_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "JOURNAL_DIR", str(tmp_path))
+    monkeypatch.setattr(soc, "POST_DATA", {})
+    monkeypatch.setattr(soc, "TIMESTAMP", 201901060030)
+    monkeypatch.setattr(soc, "post_search", lambda: monkeypatch.setattr(soc, "NUM_PAGES_TO_PARSE", 2))
+
+    page = read_fixture("soc_page.html")
+    journal_first_page("WI19", 201901060000, page)
+
+    state = start(monkeypatch, page)
+    assert soc.TIMESTAMP == 201901060000
+    assert len(state["done pages"]) == 1
+
+    # Page 1 changed since it was journaled, so the pages after it may have shifted.
+    changed_page = page.replace(b"Waitlist(12)", b"Waitlist(13)")
+    state = start(monkeypatch, changed_page)
+    assert state["done pages"] == []
+
+    # The old journal was replaced by a new one holding only the search.
+    assert journal.find_unfinished("WI19") == 201901060000
+    assert journal.read_journal("WI19", 201901060000)["done pages"] == []
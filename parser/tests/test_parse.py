@@ -0,0 +1,69 @@
+"""Tests that parsing in a process pool gives the same courses as parsing in one process, and how repeated codes group."""
+
+# Builtins
+import json
+
+# Local modules.
+from conftest import read_fixture
+from records import course_to_dict
+import soc
+
+
+def formatted_fixture():
+    """The fixture page twice over, so codes repeat across the chunks of a process pool."""
+
+    page = read_fixture("soc_page.html")
+    _, raw_data = soc.extract_data([page, page])
+
+    return soc.format_data(raw_data)
+
+
+def test_serial_and_pool_parse_identically(tmp_path, monkeypatch):
+    # Parsing may save restriction phrases it learned. Keep them out of the checkout.
+    monkeypatch.chdir(tmp_path)
+
+    formatted_data = formatted_fixture()
+
+    serial_data = soc.parse_data(formatted_data, {}, 1)
+    parallel_data = soc.parse_data(formatted_data, {}, 2)
+
+    assert len(serial_data) == 6
+
+    # Compare the printed form, so even dictionary ordering has to match.
+    assert str([course_to_dict(course) for course in serial_data]) == str([course_to_dict(course) for course in parallel_data])
+
+
+def test_pool_shares_headers_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    parallel_data = soc.parse_data(formatted_fixture(), {}, 2)
+
+    # The second CSE 100 block was parsed by another chunk, but ends up with the first block's header.
+    assert parallel_data[3].header is parallel_data[0].header
+
+
+def test_repeated_codes_merge_their_blocks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    parse_data = soc.parse_data(formatted_fixture(), {}, 1)
+    grouped = soc.compute_meta_data(parse_data)
+
+    assert sorted(grouped) == ["CSE 100", "CSE 101", "MATH 20A"]
+    assert [len(group.courses) for _, group in sorted(grouped.items())] == [2, 2, 2]
+
+    # Both CSE 100 blocks count toward its seats.
+    single = soc.compute_meta_data(parse_data[:1])["CSE 100"].seats
+    assert grouped["CSE 100"].seats == (2 * single[0], 2 * single[1])
+
+
+def test_pool_saves_learned_restrictions(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    # Four codes are more than the committed table covers, so the phrase is learned while parsing.
+    page = read_fixture("soc_page.html").replace(b"JR SR </td>", b"FR SO JR SR </td>")
+    _, raw_data = soc.extract_data([page, page])
+
+    soc.parse_data(soc.format_data(raw_data), {}, 2)
+
+    with open(str(tmp_path / "cache" / "restrictions.json")) as file:
+        assert "FR SO JR SR" in json.load(file)
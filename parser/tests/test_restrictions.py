@@ -0,0 +1,41 @@
+"""Tests the restriction table and that phrases learned while parsing are kept apart from the committed one."""
+
+# Builtins
+import json
+
+# Local modules.
+import restrictions
+
+
+def test_learned_phrases_stay_out_of_the_table(tmp_path, monkeypatch):
+    learned_path = str(tmp_path / "cache" / "restrictions.json")
+    monkeypatch.setattr(restrictions, "TABLE", None)
+    monkeypatch.setattr(restrictions, "LEARNED", {})
+
+    with open(restrictions.RESTRICTIONS_TABLE) as file:
+        committed = file.read()
+
+    restrictions.load_table(learned_path=learned_path)
+    assert "FR SO JR SR" not in restrictions.TABLE
+
+    phrase = restrictions.format_restrictions("FR SO JR SR")
+    restrictions.save_table(learned_path)
+
+    with open(restrictions.RESTRICTIONS_TABLE) as file:
+        assert file.read() == committed
+
+    with open(learned_path) as file:
+        assert json.load(file) == {"FR SO JR SR": phrase}
+
+    # The next run starts with the learned phrase.
+    restrictions.load_table(learned_path=learned_path)
+    assert restrictions.TABLE["FR SO JR SR"] == phrase
+
+
+def test_table_has_every_order():
+    table = restrictions.build_table()
+
+    # The phrase follows the order the codes are printed in.
+    assert table["SO JR"] == "Open to Sophomores and Juniors Only."
+    assert table["JR SO"] == "Open to Juniors and Sophomores Only."
+    assert table["FR SO JR"] == table["JR FR SO"] == "Open to Freshmen, Sophomores, and Juniors Only."
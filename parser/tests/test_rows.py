@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Tests that section and exam rows are parsed into every field of their records."""
+
+# Local modules.
+from records import Section, Exam
+from rows import parse_section, parse_exam, sort_days
+
+
+def test_section_with_id():
+    assert parse_section("....945848 LE A00 MWF 10:00a-10:50a CENTR 115 Gillespie, Gary 120 150") == \
+        Section("945848", "LE", "A00", "MWF", "10:00", "10:50", "CENTR", "115", "Gillespie, Gary", 120, 150)
+
+
+def test_section_without_id():
+    assert parse_section("....LE A00 TuTh 2:00p-3:20p WLH 2001 Staff 10 20") == \
+        Section("-", "LE", "A00", "TuTh", "14:00", "15:20", "WLH", "2001", "Staff", 10, 20)
+
+
+def test_section_with_tba_days_and_times():
+    # Like the original parser, the TBA left over from the building ends up in the name.
+    assert parse_section(u"....945849 DI A01 TBA TBA Núñez, José 30 40") == \
+        Section("945849", "DI", "A01", "-", "TBA", "TBA", "-", "-", u"TBA Núñez, José", 30, 40)
+
+
+def test_section_skips_tba_building_and_room():
+    # A time, then TBA for both the building and the room.
+    assert parse_section("....945850 DI A02 W 5:00p-5:50p TBA TBA Gillespie, Gary 0 30") == \
+        Section("945850", "DI", "A02", "W", "17:00", "17:50", "-", "-", "TBA Gillespie, Gary", 0, 30)
+
+
+def test_section_full_with_waitlist():
+    # Seats taken is the waitlist plus the seats available.
+    assert parse_section("....945851 LE A00 MWF 10:00a-10:50a CENTR 115 Gillespie, Gary FULL Waitlist(12) 150") == \
+        Section("945851", "LE", "A00", "MWF", "10:00", "10:50", "CENTR", "115", "Gillespie, Gary", 162, 150)
+    assert parse_section("....945856 DI A05 Th 9:00a-9:50a CENTR 105 FULL Waitlist(2) 30") == \
+        Section("945856", "DI", "A05", "Th", "9:00", "9:50", "CENTR", "105", "-", 32, 30)
+
+
+def test_section_unlimited():
+    assert parse_section("....945853 SE A00 F 1:00p-1:50p CSB 001 Gillespie, Gary Unlim") == \
+        Section("945853", "SE", "A00", "F", "13:00", "13:50", "CSB", "001", "Gillespie, Gary", "Unlimited", "Unlimited")
+
+
+def test_section_unlimited_after_tba():
+    # The leading TBA is dropped before the name.
+    assert parse_section("....945852 LA A50 TBA TBA Staff Unlim") == \
+        Section("945852", "LA", "A50", "-", "TBA", "TBA", "-", "-", "Staff", "Unlimited", "Unlimited")
+    assert parse_section("....945857 LA A51 W 5:00p-5:50p TBA TBA Gillespie, Gary Unlim") == \
+        Section("945857", "LA", "A51", "W", "17:00", "17:50", "-", "-", "Gillespie, Gary", "Unlimited", "Unlimited")
+
+
+def test_section_name_only():
+    assert parse_section("....945854 DI A03 ThTu 9:00a-9:50a CENTR 105 Gillespie, Gary") == \
+        Section("945854", "DI", "A03", "TuTh", "9:00", "9:50", "CENTR", "105", "Gillespie, Gary", "-", "-")
+    assert parse_section("....945858 DI A06 Th 9:00a-9:50a CENTR 105 Staff") == \
+        Section("945858", "DI", "A06", "Th", "9:00", "9:50", "CENTR", "105", "Staff", "-", "-")
+
+
+def test_section_seats_only():
+    assert parse_section("....945855 DI A04 Th 9:00a-9:50a CENTR 105 25 30") == \
+        Section("945855", "DI", "A04", "Th", "9:00", "9:50", "CENTR", "105", "-", 25, 30)
+
+
+def test_exam_with_room():
+    assert parse_exam("****FI 12/10/2018 M 11:30a-2:29p CENTR 115") == \
+        Exam("FI", "12/10/2018", "M", "11:30", "14:29", "CENTR", "115")
+
+
+def test_exam_without_room():
+    assert parse_exam("****MI 11/02/2018 F 7:00p-8:50p") == Exam("MI", "11/02/2018", "F", "19:00", "20:50", "-", "-")
+    assert parse_exam("****MI 11/02/2018 F TBA") == Exam("MI", "11/02/2018", "F", "TBA", "TBA", "-", "-")
+
+
+def test_sort_days():
+    assert sort_days("FWM") == "MWF"
+    assert sort_days("ThTu") == "TuTh"
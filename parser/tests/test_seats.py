@@ -0,0 +1,41 @@
+"""Tests that the seat history answers the same before and after compaction."""
+
+# Local modules.
+import seats
+
+
+def record(quarter, timestamp, cse_100, section):
+    seats.write_segment([("CSE 100", cse_100[0], cse_100[1]), ("945848", section[0], section[1])], quarter, timestamp)
+
+
+def test_fill_curve_across_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(seats, "SEATS_DIR", str(tmp_path))
+
+    record("WI19", 201901060000, (10, 100), (5, 50))
+    record("WI19", 201901060015, (12, 100), ("Unlimited", "Unlimited"))
+    seats.compact("WI19")
+    record("WI19", 201901060030, (15, 100), ("-", "-"))
+
+    assert seats.fill_curve("WI19", "CSE 100", 201901060000, 201901060030) == [
+        (201901060000, 10, 100), (201901060015, 12, 100), (201901060030, 15, 100)
+    ]
+    assert seats.fill_curve("WI19", "945848", 201901060015, 201901060030) == [
+        (201901060015, "Unlimited", "Unlimited"), (201901060030, "-", "-")
+    ]
+
+    # Compacting again gives the same answers, and only the latest segment is left.
+    seats.compact("WI19")
+
+    assert seats.fill_curve("WI19", "CSE 100", 201901060000, 201901060030)[-1] == (201901060030, 15, 100)
+    assert seats.segment_timestamps("WI19") == [201901060030]
+    assert seats.fill_curve("WI19", "CSE 999", 201901060000, 201901060030) == []
+
+
+def test_record_section_seats_returns_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(seats, "SEATS_DIR", str(tmp_path))
+
+    record("WI19", 201901060000, (10, 100), (5, 50))
+
+    changed = seats.record_section_seats({"945848": (5, 50), "945849": (0, 30)}, "WI19", 201901060015)
+
+    assert changed == {"945849": (0, 30)}
@@ -0,0 +1,57 @@
+"""Tests that a rescrape downloads only the shards that failed or were never scraped, and that no shard fails silently."""
+
+# Local modules.
+import shards
+import soc
+
+
+def test_rescrape_retries_only_failed_and_missing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(shards, "SHARDS_DIR", str(tmp_path / "shards"))
+
+    scraped, failing = [], set(["MATH"])
+
+    def scrape_shard(quarter, subject):
+        scraped.append(subject)
+
+        if subject in failing:
+            raise IOError("connection reset")
+
+        shard = {"pages": [[["NEW_CLASS", subject]]], "emails": {}}
+        shards.save_shard(quarter, subject, shard)
+
+        return shard
+
+    monkeypatch.setattr(soc, "scrape_shard", scrape_shard)
+
+    _, _, missing = soc.scrape_shards("WI19", ["CSE", "MATH"])
+    assert sorted(scraped) == ["CSE", "MATH"]
+    assert missing == ["MATH"]
+    assert shards.load_manifest("WI19") == {"CSE": {"status": "done"}, "MATH": {"status": "failed"}}
+
+    del scraped[:]
+    failing.clear()
+
+    _, raw_data, missing = soc.scrape_shards("WI19", ["CSE", "MATH", "MAE"], rescrape=True)
+    assert sorted(scraped) == ["MAE", "MATH"]
+    assert raw_data == [[["NEW_CLASS", "CSE"]], [["NEW_CLASS", "MAE"]], [["NEW_CLASS", "MATH"]]]
+    assert missing == []
+
+    # Without rescrape every shard is downloaded again.
+    del scraped[:]
+    soc.scrape_shards("WI19", ["CSE", "MATH"])
+    assert sorted(scraped) == ["CSE", "MATH"]
+
+
+def test_search_without_page_count_fails(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(shards, "SHARDS_DIR", str(tmp_path / "shards"))
+
+    # A maintenance page served with status 200 has no "of&nbsp;N" page count.
+    monkeypatch.setattr(soc.cache, "fetch", lambda *args, **kw: b"<html><body>Down for maintenance.</body></html>")
+
+    teacher_email_map, raw_data, missing = soc.scrape_shards("WI19", ["CSE"])
+
+    assert (teacher_email_map, raw_data, missing) == ({}, [], ["CSE"])
+    assert shards.load_manifest("WI19") == {"CSE": {"status": "failed"}}
+    assert shards.load_shard("WI19", "CSE") is None
@@ -0,0 +1,224 @@
+"""Python file used to send HTTP requests with timeouts, retries, and adaptive rate control. Created by Aykan Fonseca."""
+
+# Builtins
+import random
+import threading
+import time
+
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
+
+# Pip install packages.
+import requests
+
+# Local modules.
+import metrics
+
+# Constants
+from constants import MAX_REQUESTS_PER_HOST, MAX_CONCURRENCY_PER_HOST, REQUEST_TIMEOUT, REQUEST_RETRIES, BACKOFF_BASE, BACKOFF_MAX, LATENCY_SPIKE_FACTOR
+
+# Global Variables.
+LIMITERS = {} # Maps a host to the limiter of requests to it. Shared by every session, so politeness holds across shards.
+LIMITERS_LOCK = threading.Lock()
+
+RETRY_STATUSES = (429, 500, 502, 503, 504) # Throttled or a transient server error. Anything else is returned as is.
+RETRY_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError)
+MIN_SAMPLES = 10 # Latencies seen before a slow request can count as a spike.
+SMOOTHING = 0.2 # Weight of the newest latency in the smoothed latency.
+
+
+class HostLimiter(object):
+    """Caps simultaneous requests to one host, adapting the cap to how the host copes (AIMD).
+
+    The cap grows by one after a full round of successful requests, up to max_limit. It is halved on an error,
+    a throttled or failed response, or a latency spike, but at most once per round trip: requests already in
+    flight were sent under the old cap, so their failures say nothing new.
+    """
+
+    def __init__(self, limit=MAX_REQUESTS_PER_HOST, max_limit=MAX_CONCURRENCY_PER_HOST):
+        self.condition = threading.Condition()
+        self.limit = float(limit)
+        self.max_limit = max_limit
+        self.active = 0
+        self.successes = 0
+        self.latency = None # Smoothed latency of successful requests in seconds.
+        self.samples = 0
+        self.paused_until = 0
+        self.last_decrease = 0
+
+    def acquire(self):
+        """Waits until another request to the host is allowed."""
+
+        with self.condition:
+            while True:
+                pause = self.paused_until - time.time()
+
+                if pause > 0:
+                    self.condition.wait(pause)
+                elif self.active >= int(self.limit):
+                    self.condition.wait()
+                else:
+                    break
+
+            self.active += 1
+
+    def release(self, latency, is_success):
+        """Records how a request went and adapts the cap."""
+
+        with self.condition:
+            self.active -= 1
+
+            is_spike = is_success and self.samples >= MIN_SAMPLES and latency > LATENCY_SPIKE_FACTOR * self.latency
+
+            if is_success:
+                self.samples += 1
+                self.latency = latency if self.latency is None else (1 - SMOOTHING) * self.latency + SMOOTHING * latency
+
+            if is_success and not is_spike:
+                self.successes += 1
+
+                if self.successes >= self.limit:
+                    self.limit = min(self.max_limit, self.limit + 1)
+                    self.successes = 0
+            elif time.time() - self.last_decrease > (self.latency or 1):
+                self.limit = max(1, self.limit / 2)
+                self.successes = 0
+                self.last_decrease = time.time()
+                metrics.count("request_slowdowns")
+
+            self.condition.notify_all()
+
+    def cancel(self):
+        """Frees the place of a request that never reached the host. Ex. its url was invalid."""
+
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def pause(self, seconds):
+        """Holds every request to the host for seconds. Ex. when it answers with Retry-After."""
+
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+
+    def stats(self):
+        """Ex. {"limit": 6, "latency": 0.42, "requests": 212}"""
+
+        with self.condition:
+            return {"limit": int(self.limit), "latency": self.latency, "requests": self.samples}
+
+
+def host_limiter(url):
+    """Returns the limiter of url's host."""
+
+    host = urlparse(url).netloc
+
+    with LIMITERS_LOCK:
+        if host not in LIMITERS:
+            LIMITERS[host] = HostLimiter()
+
+        return LIMITERS[host]
+
+
+def backoff(attempt):
+    """Seconds to wait before retry number attempt + 1. Exponential with full jitter, so workers don't retry in lockstep."""
+
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def retry_after(response):
+    """Seconds the server asked us to wait in its Retry-After header, or None."""
+
+    value = response.headers.get("Retry-After", "") if response is not None else ""
+
+    return min(BACKOFF_MAX, int(value)) if value.strip().isdigit() else None
+
+
+def size_pool(session, size):
+    """Lets session keep size connections per host open, so that many workers can share it without reconnecting."""
+
+    session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=size))
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=size))
+
+
+def stats():
+    """Returns {host: limiter stats} for every host requested so far."""
+
+    with LIMITERS_LOCK:
+        limiters = dict(LIMITERS)
+
+    return dict((host, limiter.stats()) for host, limiter in limiters.items())
+
+
+def print_stats():
+    """Prints where the cap of each host settled and how long its requests usually take."""
+
+    for host, info in sorted(stats().items()):
+        print("- " + host + ": " + str(info["limit"]) + " requests at once, " + "%.2f" % (info["latency"] or 0) + " seconds each.")
+
+
+class Session(requests.Session):
+    """A requests.Session whose requests time out, are retried with backoff, and go through their host's limiter.
+
+    Connection errors, timeouts, and RETRY_STATUSES are retried up to retries times. If the last attempt still
+    fails, the error is raised (HTTPError for a status) instead of returning an error page as if it were data.
+    Posts are retried too: every post we send is a search, which is safe to repeat.
+    """
+
+    def __init__(self, timeout=REQUEST_TIMEOUT, retries=REQUEST_RETRIES, pool_size=MAX_REQUESTS_PER_HOST):
+        super(Session, self).__init__()
+        self.timeout = timeout
+        self.retries = retries
+        size_pool(self, pool_size)
+
+    def request(self, method, url, **kw):
+        kw.setdefault("timeout", self.timeout)
+        limiter = host_limiter(url)
+
+        for attempt in range(self.retries + 1):
+            response, error = None, None
+
+            limiter.acquire()
+            start = time.time()
+
+            try:
+                response = super(Session, self).request(method, url, **kw)
+            except RETRY_ERRORS as exception:
+                error = exception
+            except Exception:
+                limiter.cancel()
+                raise
+
+            latency = time.time() - start
+            is_success = error is None and response.status_code not in RETRY_STATUSES
+
+            limiter.release(latency, is_success)
+            metrics.observe("request_latency_seconds", latency)
+            metrics.count("requests")
+
+            if is_success:
+                return response
+
+            metrics.count("request_errors")
+
+            if attempt == self.retries:
+                break
+
+            delay = retry_after(response)
+
+            if delay is not None:
+                limiter.pause(delay)
+            else:
+                delay = backoff(attempt)
+
+            metrics.count("request_retries")
+            time.sleep(delay)
+
+        if error is not None:
+            raise error
+
+        response.raise_for_status()
+
+        return response
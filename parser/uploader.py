@@ -0,0 +1,151 @@
+"""Python file used to upload data to Firebase in concurrent, batched requests. Created by Aykan Fonseca."""
+
+# Builtins
+import json
+from multiprocessing.pool import ThreadPool
+import threading
+import time
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+# Pip install packages.
+import requests
+from tqdm import tqdm
+
+# Local modules.
+import metrics
+
+# Constants
+from constants import color, UPLOAD_BATCH_SIZE, UPLOAD_WORKERS, UPLOAD_RETRIES, UPLOAD_TIMEOUT
+
+
+def make_session(workers):
+    """Returns a session that keeps one connection alive per worker."""
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=workers)
+
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def update_url(database_url, path):
+    """The REST url for updating path. Ex. https://example.firebaseio.com/quarter/WI19.json"""
+
+    return database_url.rstrip("/") + "/" + quote(path.strip("/")) + ".json"
+
+
+def batches(updates, size):
+    """Splits updates into dictionaries of at most size paths, in sorted path order."""
+
+    paths = sorted(updates)
+
+    return [dict((path, updates[path]) for path in paths[i:i + size]) for i in range(0, len(paths), size)]
+
+
+def send_batch(session, url, batch, retries=UPLOAD_RETRIES):
+    """Sends one multi-path update, retrying with backoff. Resending is safe: it writes the same values again."""
+
+    for attempt in range(retries + 1):
+        try:
+            start = time.time()
+            response = session.patch(url, data=json.dumps(batch), timeout=UPLOAD_TIMEOUT)
+            response.raise_for_status()
+
+            metrics.observe("upload_latency_seconds", time.time() - start)
+            metrics.count("uploaded paths", len(batch))
+
+            return len(batch)
+        except requests.exceptions.RequestException:
+            if attempt == retries:
+                raise
+
+            time.sleep(2 ** attempt)
+
+
+def upload(database_url, path, updates, batch_size=UPLOAD_BATCH_SIZE, workers=UPLOAD_WORKERS, done=(), on_batch=None):
+    """Writes updates ({relative path: value}) under path, batch_size paths per request, workers requests at once.
+
+    Batches are numbered in sorted path order. Those in done are skipped, and on_batch(number) is called as each
+    of the others is sent, so an interrupted upload can be resumed.
+    Ex. upload(FIREBASE_DB2, "/quarter/WI19/", {"CSE 100": {...}, "CSE 11/seats": [10, 20]})
+    """
+
+    url = update_url(database_url, path)
+    session = make_session(workers)
+    pool = ThreadPool(workers)
+
+    numbered_batches = [(number, batch) for number, batch in enumerate(batches(updates, batch_size)) if number not in done]
+
+    try:
+        batches_sent = pool.imap_unordered(lambda numbered_batch: (numbered_batch[0], send_batch(session, url, numbered_batch[1])), numbered_batches)
+
+        for number, _ in tqdm(batches_sent, total=len(numbered_batches)):
+            if on_batch is not None:
+                on_batch(number)
+    finally:
+        pool.close()
+        pool.join()
+        session.close()
+
+
+def benchmark(num_courses=2000, latency=0.02, port=8766):
+    """Times one PUT per course against upload() on a local stub server that takes latency seconds per request."""
+
+    try:
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+        from socketserver import ThreadingMixIn
+    except ImportError:
+        from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+        from SocketServer import ThreadingMixIn
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # Allows keep-alive.
+
+        def do_PUT(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        do_PATCH = do_PUT
+
+        def log_message(self, *args):
+            pass
+
+    class StubServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+    server = StubServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever).start()
+
+    database_url = "http://127.0.0.1:" + str(port) + "/"
+    courses = dict(("DEPT " + str(i), {"seats": [i, i * 2], "title": "Course " + str(i)}) for i in range(num_courses))
+
+    try:
+        print(color.BOLD + color.DARKCYAN + "### One PUT per course ###" + color.END)
+        start = time.time()
+        for code in tqdm(courses):
+            requests.put(update_url(database_url, "/quarter/BENCH/" + code), data=json.dumps(courses[code]))
+        serial_time = time.time() - start
+
+        print(color.BOLD + color.DARKCYAN + "### Batched, concurrent updates ###" + color.END)
+        start = time.time()
+        upload(database_url, "/quarter/BENCH/", courses)
+        batched_time = time.time() - start
+    finally:
+        server.shutdown()
+
+    print("- One PUT per course: " + str(num_courses / serial_time) + " courses per second.")
+    print("- Batched updates: " + str(num_courses / batched_time) + " courses per second.")
+
+
+if __name__ == "__main__":
+    benchmark()